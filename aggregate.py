@@ -0,0 +1,78 @@
+import numpy as np
+
+
+class GroupAggregates:
+    """Per-group counts, sums and means of every number column of a store.
+
+    Groups are the distinct values of the text column `by` (its category
+    codes); rows with an empty `by` belong to no group. `update` folds in
+    the rows added since the last call, one block of rows at a time, with
+    a single bincount over all number columns at once, so the aggregates
+    of an appended-to store never need a full pass again.
+    """
+
+    block_rows = 1 << 18
+
+    def __init__(self, by):
+        self.by = by
+        self.rows = 0
+        self.columns = []
+        self.labels = []
+        self.size = np.zeros(0, dtype=np.int64)
+        self._sums = np.zeros((0, 0))
+        self._counts = np.zeros((0, 0), dtype=np.int64)
+
+    def update(self, store):
+        if store.kinds.get(self.by) != 'text':
+            raise ValueError(f'cannot group by {self.by!r}: not a text column')
+        if not self.columns:
+            self.columns = [name for name in store.columns if store.kinds[name] == 'number']
+        stop = len(store)
+        self.labels = list(store.categories(self.by))
+        self._grow(len(self.labels))
+        for start in range(self.rows, stop, self.block_rows):
+            self._add(store, start, min(start + self.block_rows, stop))
+        self.rows = max(self.rows, stop)
+
+    def sum(self, name) -> np.ndarray:
+        return self._sums[self.columns.index(name)]
+
+    def count(self, name) -> np.ndarray:
+        """Non-empty cells of `name` per group."""
+        return self._counts[self.columns.index(name)]
+
+    def mean(self, name) -> np.ndarray:
+        """Mean of `name` per group; NaN for groups without values."""
+        counts = self.count(name)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, self.sum(name) / counts, np.nan)
+
+    def members(self, store, group) -> np.ndarray:
+        """Row numbers of the rows in `group`, among the rows aggregated so far."""
+        return np.flatnonzero(store.raw(self.by)[:self.rows] == group)
+
+    def _grow(self, groups):
+        old = len(self.size)
+        if groups > old:
+            k = len(self.columns)
+            self.size = np.concatenate((self.size, np.zeros(groups - old, dtype=np.int64)))
+            sums, counts = np.zeros((k, groups)), np.zeros((k, groups), dtype=np.int64)
+            sums[:, :old] = self._sums.reshape(k, old)
+            counts[:, :old] = self._counts.reshape(k, old)
+            self._sums, self._counts = sums, counts
+
+    def _add(self, store, start, stop):
+        codes = store.raw(self.by)[start:stop]
+        grouped = codes >= 0
+        codes = codes[grouped].astype(np.int64)
+        groups, k = len(self.size), len(self.columns)
+        self.size += np.bincount(codes, minlength=groups)
+        if not k:
+            return
+        values = np.stack([store.values(name)[start:stop][grouped] for name in self.columns])
+        present = ~np.isnan(values)
+        flat = (np.arange(k)[:, None] * groups + codes[None, :]).ravel()
+        self._sums += np.bincount(flat, weights=np.where(present, values, 0.0).ravel(),
+                                  minlength=k * groups).reshape(k, groups)
+        self._counts += np.bincount(flat, weights=present.ravel(),
+                                    minlength=k * groups).reshape(k, groups).astype(np.int64)
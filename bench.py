@@ -0,0 +1,274 @@
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import argparse
+import importlib
+import json
+import platform
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import matplotlib
+import numpy as np
+import pandas as pd
+from matplotlib.backend_bases import MouseEvent
+from PyQt6 import QtCore, QtWidgets
+
+from qtchart import NativeBubbleChart
+
+APPS = {
+    'BubbleChartApp': ('p2_widgets', 'BubbleChartApp', {}),
+    'LinkedBubbleChartApp[brushing]': ('p2_brushing', 'LinkedBubbleChartApp', {}),
+    'LinkedBubbleChartApp[tooltip]': ('p2_tooltip', 'LinkedBubbleChartApp', {}),
+    'BubbleChartApp[qpainter]': ('p2_widgets', 'BubbleChartApp', {'renderer': 'qpainter'}),
+    'LinkedBubbleChartApp[brushing+qpainter]': ('p2_brushing', 'LinkedBubbleChartApp', {'renderer': 'qpainter'}),
+    'LinkedBubbleChartApp[tooltip+qpainter]': ('p2_tooltip', 'LinkedBubbleChartApp', {'renderer': 'qpainter'}),
+}
+INPUTS = ('GDP_per_capita', 'life_expectancy', 'population', 'birth_rate')
+ALTERNATE_X = 'area'
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+
+def synthetic_csv(path, rows, seed=0):
+    """A CSV of `rows` rows shaped like the factbook data the apps expect."""
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        'name': [f'country{i}' for i in range(rows)],
+        'region': rng.choice(['Africa', 'Asia', 'Europe', 'Oceania', 'Americas'], rows),
+        'CO2': rng.lognormal(10, 2, rows),
+        'GDP_per_capita': rng.lognormal(9, 1, rows),
+        'airports': rng.poisson(50, rows),
+        'alcohol': rng.uniform(0, 15, rows),
+        'area': rng.lognormal(11, 2, rows),
+        'birth_rate': rng.normal(20, 8, rows),
+        'broadband': rng.uniform(0, 50, rows),
+        'life_expectancy': rng.normal(72, 8, rows),
+        'population': rng.lognormal(15, 2, rows),
+    })
+    frame.to_csv(path, index=False)
+
+
+def summarize(samples):
+    ms = np.asarray(samples) * 1000
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    return {'n': len(ms), 'p50_ms': p50, 'p90_ms': p90, 'p99_ms': p99,
+            'mean_ms': ms.mean(), 'min_ms': ms.min(), 'max_ms': ms.max()}
+
+
+class Bench:
+    """Drives one app window offscreen and times its interactive paths.
+
+    Every operation is timed until the window is idle again: no load,
+    preparation job or scheduled render pending, and pending idle draws
+    processed. Inputs are changed with signals blocked so each timed call
+    does exactly one render.
+    """
+
+    def __init__(self, qapp, window, timeout=600):
+        self.qapp = qapp
+        self.window = window
+        self.timeout = timeout
+        if hasattr(window, 'chart_controls'):
+            self.controls = window.chart_controls[1]
+            self.chart, self.canvas = window.charts[1], window.canvases[1]
+        else:
+            self.controls = (window.x_dropdown, window.y_dropdown, window.radius_dropdown,
+                             window.color_dropdown, window.size_slider)
+            self.chart, self.canvas = window.chart, window.canvas
+
+    def busy(self):
+        w = self.window
+        return w.loader.loading or w.preparer.pending() or w.scheduler.pending()
+
+    def settle(self):
+        deadline = time.perf_counter() + self.timeout
+        while self.busy():
+            if time.perf_counter() > deadline:
+                raise TimeoutError('window did not settle')
+            self.qapp.processEvents(QtCore.QEventLoop.ProcessEventsFlag.AllEvents, 5)
+        self.qapp.processEvents()
+
+    def set_inputs(self, *names):
+        for dropdown, name in zip(self.controls, names):
+            dropdown.blockSignals(True)
+            dropdown.setCurrentText(name)
+            dropdown.blockSignals(False)
+
+    def timed(self, call):
+        start = time.perf_counter()
+        call()
+        self.settle()
+        return time.perf_counter() - start
+
+    def update_plot(self, repeat):
+        samples = []
+        for i in range(repeat):
+            self.set_inputs(ALTERNATE_X if i % 2 == 0 else INPUTS[0])
+            samples.append(self.timed(self.window.update_plot))
+        self.set_inputs(INPUTS[0])
+        self.timed(self.window.update_plot)
+        return {'update_plot': samples}
+
+    def slider_drag(self, repeat, steps=20):
+        slider = self.controls[4]
+        drag, release = [], []
+        for _ in range(repeat):
+            slider.setSliderDown(True)
+            for value in np.linspace(slider.minimum(), slider.maximum(), steps).astype(int):
+                drag.append(self.timed(lambda: slider.setValue(int(value))))
+            slider.setSliderDown(False)
+            release.append(self.timed(self.window.scheduler.flush))
+        return {'slider_drag_step': drag, 'slider_release': release}
+
+    def hover(self, samples, rng):
+        native = isinstance(self.chart, NativeBubbleChart)
+        if native:
+            rect = self.chart.plot_rect()
+            xs = rng.uniform(rect.left(), rect.right(), samples)
+            ys = rng.uniform(rect.top(), rect.bottom(), samples)
+        else:
+            bbox = self.chart.ax.bbox
+            xs = rng.uniform(bbox.x0, bbox.x1, samples)
+            ys = rng.uniform(bbox.y0, bbox.y1, samples)
+        hits = self.chart.hits
+        hits.query(xs[0], ys[0])
+        results = {'hover_hit_test': []}
+        for x, y in zip(xs, ys):
+            start = time.perf_counter()
+            hits.query(x, y)
+            results['hover_hit_test'].append(time.perf_counter() - start)
+        handler = getattr(self.window, 'hover_chart1', None)
+        if handler is not None:
+            results['hover_tooltip'] = []
+            for x, y in zip(xs, ys):
+                if native:
+                    call = lambda: self.chart.hover_at(x, y)
+                else:
+                    event = MouseEvent('motion_notify_event', self.canvas, x, y)
+                    call = lambda: handler(event)
+                results['hover_tooltip'].append(self.timed(call))
+        return results
+
+    def brush(self, repeat, rng):
+        brush = getattr(self.window, 'brushes', {}).get(1)
+        if brush is None:
+            return {}
+        native = isinstance(self.chart, NativeBubbleChart)
+        if native:
+            x0, x1, y0, y1 = self.chart.view_limits()
+        else:
+            x0, x1 = self.chart.ax.get_xlim()
+            y0, y1 = self.chart.ax.get_ylim()
+        select, redraw = [], []
+        for _ in range(repeat):
+            u, v = np.sort(rng.uniform(x0, x1, 2)), np.sort(rng.uniform(y0, y1, 2))
+            start = time.perf_counter()
+            if native:
+                brush.onselect(u[0], v[0], u[1], v[1])
+            else:
+                brush.onselect(SimpleNamespace(xdata=u[0], ydata=v[0]), SimpleNamespace(xdata=u[1], ydata=v[1]))
+            select.append(time.perf_counter() - start)
+            redraw.append(self.timed(lambda: None))
+        self.window.selection.clear()
+        self.settle()
+        return {'brush_select': select, 'brush_redraw': redraw}
+
+
+def run(apps, sizes, repeat, samples, seed=0):
+    qapp = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            path = os.path.join(tmp, f'synthetic_{rows}.csv')
+            synthetic_csv(path, rows, seed)
+            for label in apps:
+                module, cls, kwargs = APPS[label]
+                start = time.perf_counter()
+                window = getattr(importlib.import_module(module), cls)(path, **kwargs)
+                window.resize(1200, 800)
+                window.show()
+                bench = Bench(qapp, window)
+                bench.settle()
+                timings = {'load': [time.perf_counter() - start]}
+                bench.set_inputs(*INPUTS)
+                bench.timed(window.update_plot)
+                rng = np.random.default_rng(seed)
+                timings.update(bench.update_plot(repeat))
+                timings.update(bench.slider_drag(repeat))
+                timings.update(bench.hover(samples, rng))
+                timings.update(bench.brush(repeat, rng))
+                window.close()
+                window.deleteLater()
+                qapp.processEvents()
+                for op, values in timings.items():
+                    result = {'app': label, 'rows': rows, 'op': op, **summarize(values)}
+                    results.append(result)
+                    print(f"{label:32} {rows:>9} {op:18} p50 {result['p50_ms']:10.2f} ms  "
+                          f"p90 {result['p90_ms']:10.2f} ms  n={result['n']}", flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance, floor_ms=0.05):
+    """Print p50 ratios against `baseline`; returns the regressed entries."""
+    base = {(r['app'], r['rows'], r['op']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        old = base.get((result['app'], result['rows'], result['op']))
+        if old is None or old['p50_ms'] < floor_ms:
+            continue
+        ratio = result['p50_ms'] / old['p50_ms']
+        flag = 'REGRESSION' if ratio > 1 + tolerance else ''
+        print(f"{result['app']:32} {result['rows']:>9} {result['op']:18} "
+              f"{old['p50_ms']:10.2f} -> {result['p50_ms']:10.2f} ms  x{ratio:5.2f} {flag}")
+        if flag:
+            regressions.append(result)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the interactive paths of the Qt apps offscreen.')
+    parser.add_argument('-o', '--output', type=str, default='bench.json', help='Where to write the JSON results')
+    parser.add_argument('--sizes', type=str, default=','.join(map(str, SIZES)),
+                        help='Comma-separated row counts of the synthetic datasets')
+    parser.add_argument('--apps', type=str, default=','.join(APPS),
+                        help=f'Comma-separated apps to run, from: {", ".join(APPS)}')
+    parser.add_argument('--repeat', type=int, default=5, help='Repetitions of the render-bound operations')
+    parser.add_argument('--samples', type=int, default=200, help='Hover positions per app and size')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', type=str, default=None, help='Earlier results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed p50 slowdown against the baseline before failing (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    apps = args.apps.split(',')
+    unknown = [app for app in apps if app not in APPS]
+    if unknown:
+        parser.error(f'unknown apps: {", ".join(unknown)}')
+    sizes = [int(size) for size in args.sizes.split(',')]
+    results = run(apps, sizes, args.repeat, args.samples, args.seed)
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'matplotlib': matplotlib.__version__,
+            'qt': QtCore.QT_VERSION_STR,
+            'sizes': sizes,
+            'repeat': args.repeat,
+            'samples': args.samples,
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'wrote {args.output}')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        sys.exit(1 if regressions else 0)
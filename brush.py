@@ -1,17 +1,14 @@
 import matplotlib as mpl
 from matplotlib.widgets import RectangleSelector
-import pandas as pd
 from matplotlib import pyplot as plt
-import typing
 from numpy.typing import ArrayLike
 import numpy as np
+from selection import RectIndex
 
 class Brush:
     def __init__(self, xs: ArrayLike, ys: ArrayLike, ax: mpl.axes, cb,
                  color='red', alpha=0.6, edgecolor='black'):
-        self.df = pd.DataFrame()
-        self.df['x'] = xs
-        self.df['y'] = ys
+        self.index = RectIndex(xs, ys)
         self.cb = cb
         self.ax = ax
         props = dict(facecolor=color, edgecolor=edgecolor, alpha=alpha, 
@@ -20,18 +17,13 @@ class Brush:
 
     def update_coords(self, xs: ArrayLike | None = None, 
                       ys: ArrayLike | None = None):
-        if xs is not None:
-            self.df['x'] = xs 
-        if ys is not None:
-            self.df['y'] = ys
+        self.index = RectIndex(self.index.xs if xs is None else xs,
+                               self.index.ys if ys is None else ys)
 
     def callback(self, eclick, erelease):
         x1, y1 = eclick.xdata, eclick.ydata
         x2, y2 = erelease.xdata, erelease.ydata
-        selected = \
-            self.df[ self.df['x'].between(x1, x2, inclusive='both') & 
-                     self.df['y'].between(y1, y2, inclusive='both') ]
-        self.cb(selected.index.tolist())
+        self.cb(self.index.query(x1, y1, x2, y2))
 
 class interaction:
     def __init__(self, chart):
@@ -53,11 +45,10 @@ class interaction:
         plt.show()
     
     def update(self, selected):
-        if not selected:
+        if not selected.any():
             self.plot = self.ax.scatter(self.x, self.y, c=self.c, s=self.s)
         else:
-            mask = np.ones(100, dtype=bool)
-            mask[selected] = False
+            mask = ~selected
             plot = self.ax.scatter(self.x[mask], self.y[mask],
                                 s=self.s[mask], color='gray')
             self.plot = self.ax.scatter(self.x[selected], self.y[selected],
@@ -0,0 +1,227 @@
+import matplotlib as mpl
+import numpy as np
+from matplotlib.colors import ListedColormap, LogNorm, Normalize
+
+from hittest import HitTester
+from lod import DensityImage
+from tracing import span, traced
+
+
+def bubble_cmap(name='viridis', alpha=0.6, unselected=(0.5, 0.5, 0.5, 0.4)):
+    """`name` with `alpha` baked in and masked (unselected) values drawn gray."""
+    colors = mpl.colormaps[name](np.linspace(0, 1, 256))
+    colors[:, 3] = alpha
+    return ListedColormap(colors, name=f'{name}_bubbles').with_extremes(bad=unselected)
+
+
+class BubbleChart:
+    """Retained-mode bubble chart on a single axes.
+
+    The scatter collection, colorbar and legend are created on the first
+    render. Later renders only push what changed into the existing
+    artists: offsets when the x or y array is a different object, color
+    limits (and with them the colorbar, in place) when the color array is,
+    legend entries when the legend values differ. The layout is recomputed
+    only when the axis labels change, i.e. once per attribute set.
+
+    Rows outside the `selected` mask keep their position and size but are
+    drawn gray: their color values are masked and the colormap renders
+    masked values as its "bad" color. `set_selection` therefore recolors
+    the existing collection without touching offsets, sizes or layout.
+
+    A `preview` render draws at most `preview_points` rows (a fixed random
+    sample) without marker edges and blits only the scatter collection
+    over a cached snapshot of the axes, leaving the color limits, colorbar
+    and legend untouched. It is meant for slider drags and must be followed
+    by a full render, which the caller draws as usual.
+
+    `color_limits` (vmin, vmax), typically from the store's column
+    statistics, spare the min/max scan of the colors; `color_log` switches
+    the colorbar and bubbles to a log norm.
+
+    `hits` indexes the points of the last full render for hover lookups
+    and answers with dataset row numbers (`rows[i]` for point i when the
+    render shows a subset of the rows).
+
+    With a `lod_threshold`, views holding more points than that are drawn
+    as a density image (see lod.DensityImage) instead of bubbles; previews
+    are skipped while the image is shown, since sizes do not affect it.
+    """
+
+    preview_points = 5000
+
+    def __init__(self, figure, legend_color='white', lod_threshold=None):
+        self.figure = figure
+        self.ax = figure.add_subplot(111)
+        self.legend_color = legend_color
+        self.lod_threshold = lod_threshold
+        self.scatter = None
+        self.density = None
+        self.colorbar = None
+        self.legend = None
+        self._labels = None
+        self._xy = (None, None)
+        self._colors = None
+        self._sample = None
+        self._snapshot = None
+        self._linewidths = None
+        self._previewed = False
+        self._legend_values = None
+        self.hits = HitTester(self.ax)
+
+    @traced('chart.render')
+    def render(self, x, y, sizes, colors, legend_sizes, legend_bubbles,
+               x_label, y_label, color_label, title, selected=None, preview=False,
+               color_limits=None, color_log=False, rows=None):
+        if preview and self.scatter is not None:
+            if self.density is not None and self.density.active:
+                return
+            with span('preview'):
+                self._render_preview(x, y, sizes, colors, selected)
+            return
+        self._snapshot = None
+        moved = x is not self._xy[0] or y is not self._xy[1]
+        recolored = colors is not self._colors
+        self._colors = colors
+
+        with span('artists'):
+            if self.scatter is None:
+                self._create(np.column_stack((x, y)), sizes, colors, legend_sizes, legend_bubbles, color_label)
+                if color_log:
+                    self._set_norm(self._norm(colors, color_limits, color_log))
+                elif color_limits is not None:
+                    self._update_clim(*color_limits)
+            else:
+                if moved or self._previewed:
+                    self.scatter.set_offsets(np.column_stack((x, y)))
+                if self._previewed:
+                    self.scatter.set_linewidths(self._linewidths)
+                self.scatter.set_sizes(sizes)
+                if color_log != isinstance(self.scatter.norm, LogNorm):
+                    self._set_norm(self._norm(colors, color_limits, color_log))
+                elif color_limits is not None:
+                    self._update_clim(*color_limits)
+                elif recolored and len(colors):
+                    self._update_clim(colors.min(), colors.max())
+                self._update_legend(legend_sizes, legend_bubbles)
+            self._previewed = False
+            self.set_selection(selected)
+        with span('hit_index'):
+            self.hits.set_points(x, y, sizes, rows)
+            if self.density is not None:
+                self.density.set_points(x, y, colors)
+
+        if moved:
+            self._xy = (x, y)
+            with span('rescale'):
+                self._rescale(self.scatter.get_offsets())
+
+        labels = (x_label, y_label, color_label, title)
+        if labels != self._labels:
+            self._labels = labels
+            with span('layout'):
+                self.ax.set_xlabel(x_label)
+                self.ax.set_ylabel(y_label)
+                self.ax.set_title(title)
+                self.colorbar.set_label(color_label)
+                self.figure.tight_layout()
+
+    def set_selection(self, selected):
+        """Gray out the rows outside `selected`; None colors every row.
+
+        A mask for a different number of rows than the last render (the
+        data grew since) is ignored; the next render applies it.
+        """
+        if self.scatter is None or (selected is not None and len(selected) != len(self._colors)):
+            return
+        if selected is None:
+            self.scatter.set_array(self._colors)
+        else:
+            self.scatter.set_array(np.ma.masked_array(self._colors, mask=~selected))
+        if self.density is not None:
+            self.density.set_selection(selected)
+
+    def _render_preview(self, x, y, sizes, colors, selected):
+        if len(x) > self.preview_points:
+            if self._sample is None or self._sample[0] != len(x):
+                rng = np.random.default_rng(0)
+                index = np.sort(rng.choice(len(x), self.preview_points, replace=False))
+                self._sample = (len(x), index)
+            index = self._sample[1]
+            x, y, sizes, colors = x[index], y[index], sizes[index], colors[index]
+            if selected is not None:
+                selected = selected[index]
+        self.scatter.set_offsets(np.column_stack((x, y)))
+        self.scatter.set_sizes(sizes)
+        if selected is None:
+            self.scatter.set_array(colors)
+        else:
+            self.scatter.set_array(np.ma.masked_array(colors, mask=~selected))
+        self.scatter.set_linewidths(0)
+        self._previewed = True
+        self._blit_points()
+
+    def _blit_points(self):
+        canvas = self.figure.canvas
+        if self._snapshot is None:
+            self.scatter.set_visible(False)
+            # Without the draw_event, blit overlays keep the background of
+            # the last full draw instead of re-caching one with no bubbles.
+            with canvas.callbacks.blocked(signal='draw_event'):
+                canvas.draw()
+            self._snapshot = canvas.copy_from_bbox(self.ax.bbox)
+            self.scatter.set_visible(True)
+        canvas.restore_region(self._snapshot)
+        self.ax.draw_artist(self.scatter)
+        canvas.blit(self.ax.bbox)
+
+    def _create(self, offsets, sizes, colors, legend_sizes, legend_bubbles, color_label):
+        self.scatter = self.ax.scatter(offsets[:, 0], offsets[:, 1], s=sizes, c=colors,
+                                       cmap=bubble_cmap())
+        self._linewidths = self.scatter.get_linewidths()
+        if self.lod_threshold is not None:
+            self.density = DensityImage(self.ax, self.scatter, self.lod_threshold)
+        self.colorbar = self.figure.colorbar(self.scatter, ax=self.ax, label=color_label)
+
+        for size, scaled_size in zip(legend_sizes, legend_bubbles):
+            self.ax.scatter([], [], s=scaled_size, c=self.legend_color, alpha=0.6, label=f'{size:.1f}')
+        self._legend_values = (tuple(legend_sizes), tuple(legend_bubbles))
+        self.legend = self.ax.legend(scatterpoints=1, frameon=True, labelspacing=1,
+                                     title="Bubble Size", loc="upper right")
+
+    def _norm(self, colors, color_limits, color_log):
+        # A norm switched in without limits autoscales a LogNorm from
+        # whatever limits the mappable held, which fails on a linear
+        # range that reaches zero; build it with its final limits.
+        if color_limits is None and len(colors):
+            color_limits = colors.min(), colors.max()
+        return (LogNorm if color_log else Normalize)(*(color_limits or (None, None)))
+
+    def _set_norm(self, norm):
+        self.scatter.set_norm(norm)
+        if self.density is not None:
+            self.density.set_norm(norm)
+
+    def _update_clim(self, vmin, vmax):
+        # Changing the norm limits updates the colorbar in place through
+        # the mappable's callbacks; equal limits leave both untouched.
+        if (vmin, vmax) != self.scatter.get_clim():
+            self.scatter.set_clim(vmin, vmax)
+
+    def _update_legend(self, legend_sizes, legend_bubbles):
+        values = (tuple(legend_sizes), tuple(legend_bubbles))
+        if values == self._legend_values:
+            return
+        self._legend_values = values
+        entries = zip(self.legend.legend_handles, self.legend.get_texts(), legend_sizes, legend_bubbles)
+        for handle, text, size, scaled_size in entries:
+            handle.set_sizes([scaled_size])
+            text.set_text(f'{size:.1f}')
+
+    def _rescale(self, offsets):
+        if not len(offsets):
+            return
+        self.ax.set_autoscale_on(True)
+        self.ax.ignore_existing_data_limits = True
+        self.ax.update_datalim(offsets)
+        self.ax.autoscale_view()
@@ -0,0 +1,46 @@
+class ConnectionRegistry:
+    """Keeps at most one live canvas handler, brush or artist per role.
+
+    Registering something under a role that is already taken first
+    disconnects or removes the previous owner, so setup code that runs on
+    every redraw cannot stack up duplicate handlers. `live_count` reports
+    how many roles are currently held.
+    """
+
+    def __init__(self):
+        self._release = {}
+
+    def add(self, role, release):
+        """Hold `role`, calling `release()` when it is replaced or released."""
+        self.release(role)
+        self._release[role] = release
+
+    def connect(self, role, canvas, event, handler):
+        cid = canvas.mpl_connect(event, handler)
+        self.add(role, lambda: canvas.mpl_disconnect(cid))
+        return cid
+
+    def brush(self, role, brush):
+        self.add(role, brush.disconnect)
+        return brush
+
+    def artist(self, role, artist):
+        self.add(role, artist.remove)
+        return artist
+
+    def release(self, role):
+        release = self._release.pop(role, None)
+        if release is not None:
+            release()
+
+    def release_all(self):
+        for role in list(self._release):
+            self.release(role)
+
+    def live_count(self):
+        return len(self._release)
+
+
+def handler_count(canvas, event):
+    """Number of callbacks matplotlib will run for `event` on `canvas`."""
+    return len(canvas.callbacks.callbacks.get(event, {}))
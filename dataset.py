@@ -0,0 +1,364 @@
+import io
+import os
+import threading
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+import sidecar
+from aggregate import GroupAggregates
+from stats import ColumnStats
+from tracing import span, traced
+
+
+def coerce_column(values) -> np.ndarray:
+    """Parse a column into a contiguous float64 array.
+
+    Text cells are stripped of ',' thousands separators first, so "13,513"
+    becomes 13513.0 instead of NaN. Anything unparseable becomes NaN.
+    """
+    series = pd.Series(values)
+    if not is_numeric_dtype(series.dtype):
+        series = series.astype(str).str.replace(',', '', regex=False)
+    parsed = pd.to_numeric(series, errors='coerce')
+    return np.ascontiguousarray(parsed.to_numpy(dtype=np.float64, na_value=np.nan))
+
+
+def parse_frame(frame: pd.DataFrame, kinds=None) -> dict:
+    """Split a parsed CSV chunk into one array per column.
+
+    Number columns become float64 arrays (see `coerce_column`), text
+    columns object arrays of str with None for empty cells. `kinds` maps
+    column names to 'number' or 'text'; columns missing from it are
+    classified here: a column is text when fewer than half of its
+    non-empty cells parse as numbers. Pass the kinds of the first chunk
+    (`column_kinds`) for every later chunk so a column never changes kind.
+    """
+    columns = {}
+    for name in frame.columns:
+        values = frame[name]
+        kind = (kinds or {}).get(name)
+        parsed = coerce_column(values) if kind != 'text' else None
+        if kind is None:
+            present = values.notna().sum()
+            kind = 'number' if np.count_nonzero(~np.isnan(parsed)) * 2 >= present else 'text'
+        if kind == 'number':
+            columns[name] = parsed
+        else:
+            text = values.astype(object)
+            columns[name] = np.where(values.notna(), text.astype(str), None)
+    return columns
+
+
+def column_kinds(columns: dict) -> dict:
+    """The kinds of the columns returned by `parse_frame`."""
+    return {name: 'text' if arr.dtype == object else 'number' for name, arr in columns.items()}
+
+
+class _Window(io.RawIOBase):
+    """Reads bytes [start, stop) of an open binary file."""
+
+    def __init__(self, f, start, stop):
+        f.seek(start)
+        self.f = f
+        self.remaining = stop - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        n = min(len(b), self.remaining)
+        if n <= 0:
+            return 0
+        got = self.f.readinto(memoryview(b)[:n])
+        self.remaining -= got
+        return got
+
+
+def complete_end(path, block=1 << 16):
+    """Offset just past the last newline of `path`, i.e. the end of the
+    rows a writer appending whole lines has finished (0 when none)."""
+    with open(path, 'rb') as f:
+        pos = f.seek(0, os.SEEK_END)
+        while pos > 0:
+            start = max(0, pos - block)
+            f.seek(start)
+            i = f.read(pos - start).rfind(b'\n')
+            if i >= 0:
+                return start + i + 1
+            pos = start
+    return 0
+
+
+def header(path, usecols=None):
+    """The column names of a CSV, read from its first line."""
+    return list(pd.read_csv(path, nrows=0, usecols=usecols).columns)
+
+
+def read_chunks(path, chunksize=100_000, usecols=None, start=0, stop=None, names=None, kinds=None):
+    """Parse a CSV chunk by chunk.
+
+    Yields `(columns, fraction)` with `columns` as returned by
+    `parse_frame` and `fraction` the share of the file read so far, so
+    only one chunk of raw text is ever held in memory.
+
+    `start`/`stop` restrict parsing to a byte range of whole lines; a
+    range past the header needs the file's column `names`, and the
+    `kinds` already known keep appended rows consistent with earlier ones.
+    """
+    stop = os.path.getsize(path) if stop is None else stop
+    if stop <= start:
+        return
+    options = {} if start == 0 else {'header': None, 'names': names}
+    with open(path, 'rb') as f:
+        window = io.BufferedReader(_Window(f, start, stop))
+        for frame in pd.read_csv(window, chunksize=chunksize, usecols=usecols, **options):
+            with span('parse_chunk', 'load', rows=len(frame)):
+                columns = parse_frame(frame, kinds)
+            kinds = column_kinds(columns)
+            yield columns, (f.tell() - start) / (stop - start)
+
+
+class ColumnStore:
+    """Every column of a dataset, parsed once into compact typed arrays.
+
+    Number columns are float64 arrays; text columns are dictionary encoded
+    as int32 codes into a list of distinct strings (-1 for empty cells)
+    and read back with `text` or `row`. The charts only read from
+    `values`, `nan_mask` and `filled`, which never re-parse anything; text
+    columns read as all-NaN there.
+
+    Rows arrive through `extend` (or `append` for a DataFrame) into
+    buffers with spare capacity, so a store can be filled chunk by chunk
+    while it is being displayed. Every extend bumps `version`; derived
+    arrays (`nan_mask`, `filled`, `texts`) are then extended with just the
+    new rows, and handed out as new array objects, so views compare array
+    identity to notice the growth.
+
+    `attach` adopts finished arrays instead, e.g. the memory-mapped
+    columns of a sidecar cache (see sidecar.py), which `from_csv` prefers
+    over parsing whenever the cache matches the CSV.
+    """
+
+    def __init__(self, frame: pd.DataFrame = None):
+        self.columns = []
+        self.kinds = {}
+        self.version = 0
+        self._rows = 0
+        self._buffers = {}
+        self._categories = {}
+        self._category_ids = {}
+        self._cache = {}
+        self._views = {}
+        self._stats = {}
+        self._groups = {}
+        self._stats_lock = threading.Lock()
+        if frame is not None:
+            self.append(frame)
+
+    @classmethod
+    def from_csv(cls, path, usecols=None, chunksize=100_000, cache=True):
+        store = cls()
+        cached = sidecar.read(path, usecols) if cache else None
+        if cached is not None:
+            store.attach(*cached)
+            return store
+        for columns, _ in read_chunks(path, chunksize=chunksize, usecols=usecols):
+            store.extend(columns)
+        if cache:
+            store.write_cache(path)
+        return store
+
+    def __len__(self):
+        return self._rows
+
+    def __getitem__(self, name) -> np.ndarray:
+        return self.values(name)
+
+    def append(self, frame: pd.DataFrame):
+        self.extend(parse_frame(frame, self.kinds))
+
+    @traced('extend', 'load')
+    def extend(self, columns: dict):
+        """Append the rows of one `parse_frame` result."""
+        if not self.columns:
+            self.columns = list(columns)
+            self.kinds = column_kinds(columns)
+        n = len(next(iter(columns.values()))) if columns else 0
+        end = self._rows + n
+        for name in self.columns:
+            arr = columns[name]
+            if self.kinds[name] == 'text':
+                arr = self._encode(name, arr)
+            buf = self._buffers.get(name)
+            if buf is None or len(buf) < end:
+                grown = np.empty(max(end, 2 * (0 if buf is None else len(buf)), 1024), dtype=arr.dtype)
+                if buf is not None:
+                    grown[:self._rows] = buf[:self._rows]
+                buf = self._buffers[name] = grown
+            buf[self._rows:end] = arr
+        self._rows = end
+        self.version += 1
+        for name in list(self._stats):
+            self.stats(name)
+        for by in list(self._groups):
+            self.groups(by)
+
+    def attach(self, arrays: dict, kinds: dict, categories: dict):
+        """Adopt complete columns: float64 values for number columns, int32
+        codes into `categories[name]` for text columns. The arrays are used
+        as they are (memory maps stay memory maps) until the next extend."""
+        self.columns = list(arrays)
+        self.kinds = dict(kinds)
+        self._buffers = dict(arrays)
+        self._categories = dict(categories)
+        self._category_ids = {}
+        self._rows = len(next(iter(arrays.values()))) if arrays else 0
+        self._cache.clear()
+        with self._stats_lock:
+            self._stats = {}
+            self._groups = {}
+        self.version += 1
+
+    def raw(self, name) -> np.ndarray:
+        """The stored array: values for number columns, codes for text ones."""
+        return self._buffers[name][:self._rows]
+
+    def categories(self, name):
+        return self._categories.get(name, [])
+
+    def write_cache(self, path):
+        """Save the columns as the sidecar cache of the CSV at `path`."""
+        arrays = {name: self.raw(name) for name in self.columns}
+        return sidecar.write(path, arrays, self.kinds, self._categories, header(path))
+
+    def numeric_columns(self):
+        """Columns with at least one parseable value."""
+        return [name for name in self.columns if not self.nan_mask(name).all()]
+
+    def values(self, name) -> np.ndarray:
+        if self.kinds[name] == 'text':
+            return self._cached(('values', name), lambda start, stop: np.full(stop - start, np.nan))
+        version = self.version
+        view = self._views.get(name)
+        if view is None or view[0] != version:
+            view = self._views[name] = (version, self._buffers[name][:self._rows])
+        return view[1]
+
+    def nan_mask(self, name) -> np.ndarray:
+        return self._cached(('nan', name), lambda start, stop: np.isnan(self.values(name)[start:stop]))
+
+    def filled(self, name, fill=0.0) -> np.ndarray:
+        """Column values with NaN replaced by `fill`, cached per (name, fill).
+
+        A number column without NaN is returned as its stored array, so a
+        memory-mapped column reaches the charts without a copy.
+        """
+        if self.kinds[name] == 'number':
+            stats, values = self.stats(name), self.values(name)
+            if not stats.nan_count and stats.rows == len(values):
+                return values
+
+        def compute(start, stop):
+            return np.where(self.nan_mask(name)[start:stop], fill, self.values(name)[start:stop])
+        return self._cached(('filled', name, fill), compute)
+
+    def stats(self, name) -> ColumnStats:
+        """Min/max, NaN count and quantile sketch of a number column.
+
+        Built from the whole column on first use, then topped up with just
+        the appended rows: on every extend for columns already indexed,
+        and on access for anything a concurrent extend has added since.
+        """
+        with self._stats_lock:
+            entry = self._stats.get(name)
+            if entry is None:
+                entry = self._stats[name] = ColumnStats()
+            rows = self._rows
+            if entry.rows < rows:
+                entry.update(self.values(name)[entry.rows:rows])
+            return entry
+
+    def groups(self, by) -> GroupAggregates:
+        """Per-group aggregates of every number column, grouped by the text
+        column `by`; kept up to date like `stats`."""
+        with self._stats_lock:
+            entry = self._groups.get(by)
+            if entry is None:
+                entry = GroupAggregates(by)
+            if entry.rows < self._rows:
+                entry.update(self)
+            self._groups[by] = entry
+            return entry
+
+    def text(self, name, row):
+        """The cell at `row` as a string ('nan' when empty)."""
+        if self.kinds[name] == 'text':
+            code = self._buffers[name][row]
+            return self._categories[name][code] if code >= 0 else 'nan'
+        value = self._buffers[name][row]
+        return str(int(value)) if value.is_integer() else str(value)
+
+    def texts(self, name) -> np.ndarray:
+        """The whole column as an object array of the strings `text` gives, cached."""
+        return self._cached(('texts', name), lambda start, stop: self._format_column(name, start, stop))
+
+    def row(self, row) -> dict:
+        """Every cell of `row` as a string, keyed by column name."""
+        return {name: self.text(name, row) for name in self.columns}
+
+    def _cached(self, key, compute):
+        # `compute(start, stop)` derives rows start:stop of a per-row array.
+        # Entries are tagged with the version they were computed at, so an
+        # array computed by a worker thread across an extend is never
+        # served for the grown store. Rows are only ever appended, so a
+        # stale entry is caught up by deriving just the new rows into the
+        # spare capacity of its buffer; each version gets a new view.
+        version, rows = self.version, self._rows
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        done, buf = (0, None) if entry is None else (len(entry[1]), entry[2])
+        if done > rows:
+            done, buf = 0, None
+        part = compute(done, rows)
+        if buf is None or len(buf) < rows:
+            grown = np.empty(max(rows, 2 * done), dtype=part.dtype)
+            if done:
+                grown[:done] = buf[:done]
+            buf = grown
+        buf[done:rows] = part
+        arr = buf[:rows]
+        self._cache[key] = (version, arr, buf)
+        return arr
+
+    def _format_column(self, name, start, stop):
+        raw = self.raw(name)[start:stop]
+        if self.kinds[name] == 'text':
+            labels = np.array(list(self._categories[name]) + ['nan'], dtype=object)
+            return labels[np.where(raw >= 0, raw, len(labels) - 1)]
+        strings = raw.astype(str).astype(object)
+        integral = np.isfinite(raw) & (raw == np.floor(raw))
+        small = integral & (np.abs(raw) < 2.0 ** 63)
+        strings[small] = raw[small].astype(np.int64).astype(str)
+        for i in np.flatnonzero(integral & ~small):
+            strings[i] = str(int(raw[i]))
+        return strings
+
+    def _encode(self, name, strings):
+        categories = self._categories.setdefault(name, [])
+        if not isinstance(categories, list):
+            categories = self._categories[name] = list(categories)
+        ids = self._category_ids.get(name)
+        if ids is None:
+            ids = self._category_ids[name] = {value: i for i, value in enumerate(categories)}
+        codes, uniques = pd.factorize(strings, use_na_sentinel=True)
+        remap = np.empty(len(uniques) + 1, dtype=np.int32)
+        remap[-1] = -1
+        for i, value in enumerate(uniques):
+            code = ids.get(value)
+            if code is None:
+                code = ids[value] = len(categories)
+                categories.append(value)
+            remap[i] = code
+        return remap[codes]
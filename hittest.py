@@ -0,0 +1,98 @@
+import numpy as np
+
+
+class HitTester:
+    """Finds the marker under the cursor with a uniform grid in display space.
+
+    Marker centers are bucketed into square cells at least as wide as the
+    largest marker radius (plus `pickradius`), so a query only has to look
+    at the 3x3 cells around the cursor: a binary search per cell row plus
+    a distance check over a handful of candidates. The grid is rebuilt
+    lazily, only when the points, their sizes or the axes' view transform
+    have changed since the last query.
+
+    Sizes are scatter sizes (points**2), as passed to `ax.scatter(s=...)`;
+    `pickradius` is in pixels and matches `Collection.contains`. Renderers
+    other than matplotlib override the `_view_key`, `_to_display`,
+    `_display_bounds` and `_pixels_per_point` hooks.
+    """
+
+    def __init__(self, ax, pickradius=5.0):
+        self.ax = ax
+        self.pickradius = pickradius
+        self._points = None
+        self._key = None
+        self._grid = None
+
+    def set_points(self, x, y, sizes, rows=None):
+        """Index new points; `rows` maps each point back to a dataset row."""
+        x = np.asarray(x, dtype=float)
+        sizes = np.broadcast_to(np.asarray(sizes, dtype=float), x.shape)
+        self._points = (x, np.asarray(y, dtype=float), sizes, rows)
+        self._key = None
+
+    def query(self, px, py):
+        """Return the row of the closest marker containing (px, py), or None."""
+        if self._points is None or px is None or py is None:
+            return None
+        key = self._view_key()
+        if key != self._key:
+            self._grid = self._build()
+            self._key = key
+        xy, radius, cell, origin, shape, order, cells = self._grid
+        if not len(order):
+            return None
+
+        cx = int((px - origin[0]) // cell)
+        cy = int((py - origin[1]) // cell)
+        candidates = []
+        for gy in range(max(cy - 1, 0), min(cy + 2, shape[1])):
+            lo = gy * shape[0] + max(cx - 1, 0)
+            hi = gy * shape[0] + min(cx + 1, shape[0] - 1)
+            if lo > hi:
+                continue
+            start, stop = np.searchsorted(cells, (lo, hi + 1))
+            candidates.append(order[start:stop])
+        if not candidates:
+            return None
+        candidates = np.concatenate(candidates)
+        d2 = (xy[candidates, 0] - px) ** 2 + (xy[candidates, 1] - py) ** 2
+        hit = d2 <= (radius[candidates] + self.pickradius) ** 2
+        if not hit.any():
+            return None
+        best = candidates[hit][np.argmin(d2[hit])]
+        rows = self._points[3]
+        return int(best if rows is None else rows[best])
+
+    def _view_key(self):
+        ax = self.ax
+        return (ax.viewLim.bounds, ax.bbox.bounds, ax.figure.dpi,
+                ax.get_xscale(), ax.get_yscale())
+
+    def _to_display(self, xy):
+        return self.ax.transData.transform(xy)
+
+    def _display_bounds(self):
+        """(x0, y0, width, height) of the plot area in display space."""
+        return self.ax.bbox.bounds
+
+    def _pixels_per_point(self):
+        return self.ax.figure.dpi / 72
+
+    def _build(self):
+        x, y, sizes, _ = self._points
+        xy = self._to_display(np.column_stack((x, y)))
+        radius = np.sqrt(np.abs(sizes)) / 2 * self._pixels_per_point()
+        reach = (radius.max() if len(radius) else 0) + self.pickradius
+        cell = max(reach, 4.0)
+
+        x0, y0, width, height = self._display_bounds()
+        origin = (x0 - reach, y0 - reach)
+        shape = (int((width + 2 * reach) // cell) + 1, int((height + 2 * reach) // cell) + 1)
+        gx = np.floor((xy[:, 0] - origin[0]) / cell)
+        gy = np.floor((xy[:, 1] - origin[1]) / cell)
+        inside = (gx >= 0) & (gx < shape[0]) & (gy >= 0) & (gy < shape[1])
+        index = np.flatnonzero(inside)
+        keys = gy[index].astype(np.int64) * shape[0] + gx[index].astype(np.int64)
+        sort = np.argsort(keys, kind='stable')
+        return xy, radius, cell, origin, shape, index[sort], keys[sort]
@@ -0,0 +1,212 @@
+import os
+import time
+from PyQt6 import QtCore
+
+import sidecar
+from dataset import column_kinds, complete_end, header, read_chunks
+
+
+class _ChunkReader(QtCore.QThread):
+    chunk = QtCore.pyqtSignal(object, float)
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, path, usecols, chunksize, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.usecols = usecols
+        self.chunksize = chunksize
+        self.stop = None
+
+    def run(self):
+        try:
+            for columns, fraction in read_chunks(self.path, self.chunksize, self.usecols, stop=self.stop):
+                if self.isInterruptionRequested():
+                    return
+                self.chunk.emit(columns, fraction)
+        except Exception as exc:
+            self.failed.emit(f'{type(exc).__name__}: {exc}')
+
+
+class _TailReader(QtCore.QThread):
+    # Polls the file size every `interval_ms` and parses only the whole
+    # lines appended past `offset`; `caught_up` follows the chunks of one
+    # round, so the loader refreshes views at most once per interval.
+    chunk = QtCore.pyqtSignal(object)
+    caught_up = QtCore.pyqtSignal()
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, path, usecols, chunksize, interval_ms, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.usecols = usecols
+        self.chunksize = chunksize
+        self.interval_ms = interval_ms
+        self.offset = 0
+        self.kinds = None
+
+    def run(self):
+        size, names = None, None
+        try:
+            while not self._wait():
+                current = os.path.getsize(self.path)
+                if current == size:
+                    continue
+                size = current
+                end = complete_end(self.path)
+                if end < self.offset:
+                    self.failed.emit(f'{self.path} was truncated; stopped following it')
+                    return
+                if end == self.offset:
+                    continue
+                names = names or header(self.path)
+                for columns, _ in read_chunks(self.path, self.chunksize, self.usecols,
+                                              self.offset, end, names, self.kinds):
+                    if self.isInterruptionRequested():
+                        return
+                    self.kinds = column_kinds(columns)
+                    self.chunk.emit(columns)
+                self.offset = end
+                self.caught_up.emit()
+        except Exception as exc:
+            self.failed.emit(f'{type(exc).__name__}: {exc}')
+
+    def _wait(self):
+        # Sleeps one interval in short steps; True once interrupted.
+        for _ in range(max(1, self.interval_ms // 50)):
+            if self.isInterruptionRequested():
+                return True
+            self.msleep(min(50, self.interval_ms))
+        return self.isInterruptionRequested()
+
+
+class _CacheWriter(QtCore.QThread):
+    def __init__(self, path, store, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.store = store
+
+    def run(self):
+        self.store.write_cache(self.path)
+
+
+class CsvLoader(QtCore.QObject):
+    """Streams a CSV into a ColumnStore without blocking the event loop.
+
+    A worker thread reads and parses the file chunk by chunk (see
+    dataset.read_chunks); each parsed chunk is appended to `store` on the
+    GUI thread, so views never see the store change under them while they
+    render. `progress` reports the share of the file read in percent.
+    `updated` fires after the first chunk and then at most once every
+    `refresh_ms` while loading, so the caller can re-render a partial view
+    without redrawing for every chunk, and once more before `finished`.
+
+    With `cache` on, a sidecar cache that matches the CSV is memory-mapped
+    instead (the signals still fire, from the event loop), and a fresh
+    parse is written back as the cache on another worker thread, then
+    adopted in place of the parsed arrays. Windows and processes opening
+    the same CSV thus map one copy of the columns instead of each holding
+    their own.
+
+    With `follow`, the file is tailed once loaded: every `follow_ms` a
+    worker checks its size and parses just the whole lines appended since
+    the last look, which are appended to `store` followed by one `updated`.
+    The initial load stops at the last complete line so a row being
+    written is never split, and no cache is written for a followed file.
+    """
+
+    progress = QtCore.pyqtSignal(int)
+    updated = QtCore.pyqtSignal()
+    finished = QtCore.pyqtSignal()
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, path, store, usecols=None, chunksize=100_000, refresh_ms=1000,
+                 cache=True, follow=False, follow_ms=1000, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.store = store
+        self.usecols = usecols
+        self.cache = cache
+        self.refresh_ms = refresh_ms
+        self.follow = follow
+        self.loading = False
+        self.following = False
+        self._refreshed = None
+        self._error = None
+        self._reader = _ChunkReader(path, usecols, chunksize, self)
+        self._reader.chunk.connect(self._add_chunk)
+        self._reader.failed.connect(self._fail)
+        self._reader.finished.connect(self._finish)
+        self._writer = _CacheWriter(path, store, self)
+        self._writer.finished.connect(self._adopt_cache)
+        self._tail = _TailReader(path, usecols, chunksize, follow_ms, self)
+        self._tail.chunk.connect(self._add_appended)
+        self._tail.caught_up.connect(self._caught_up)
+        self._tail.failed.connect(self._fail)
+
+    def start(self):
+        self.loading = True
+        use_cache = self.cache
+        if self.follow:
+            self._reader.stop = self._tail.offset = complete_end(self.path)
+            use_cache = use_cache and self._tail.offset == os.path.getsize(self.path)
+        cached = sidecar.read(self.path, self.usecols) if use_cache else None
+        if cached is not None:
+            self.store.attach(*cached)
+            QtCore.QTimer.singleShot(0, self._finish)
+        else:
+            self._reader.start()
+
+    def cancel(self):
+        """Stop reading and wait for the workers; no more signals follow."""
+        self._reader.requestInterruption()
+        self._tail.requestInterruption()
+        self._reader.wait()
+        self._tail.wait()
+        self._writer.wait()
+        self.loading = False
+        self.following = False
+
+    def _add_chunk(self, columns, fraction):
+        if not self.loading:
+            return
+        self.store.extend(columns)
+        self.progress.emit(int(fraction * 100))
+        now = time.monotonic()
+        if self._refreshed is None or (now - self._refreshed) * 1000 >= self.refresh_ms:
+            self._refreshed = now
+            self.updated.emit()
+
+    def _adopt_cache(self):
+        # Swap the parsed heap arrays for the memory-mapped cache just
+        # written, so this process shares its pages with every other
+        # window that maps the same file.
+        cached = sidecar.read(self.path, self.usecols)
+        if cached is not None and len(next(iter(cached[0].values()), ())) == len(self.store):
+            self.store.attach(*cached)
+
+    def _add_appended(self, columns):
+        if self.following:
+            self.store.extend(columns)
+
+    def _caught_up(self):
+        if self.following:
+            self.updated.emit()
+
+    def _fail(self, message):
+        self._error = message
+        self.failed.emit(message)
+
+    def _finish(self):
+        if not self.loading:
+            return
+        self.loading = False
+        if self.follow:
+            if self._error is None:
+                self._tail.kinds = self.store.kinds or None
+                self.following = True
+                self._tail.start()
+        elif self.cache and self._reader.isFinished() and self._error is None:
+            self._writer.start()
+        self.progress.emit(100)
+        self.updated.emit()
+        self.finished.emit()
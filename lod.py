@@ -0,0 +1,116 @@
+import numpy as np
+from matplotlib.image import AxesImage
+
+
+def bin_points(x, y, values, extent, shape):
+    """Bin points into a (ny, nx) grid over `extent` = (x0, x1, y0, y1).
+
+    Returns the per-bin point count and the mean of `values` per bin (0
+    where a bin is empty). Points outside the extent or with NaN
+    coordinates are dropped. Points with a non-finite value still count
+    but are left out of the mean, which is NaN for a bin holding only
+    such points.
+    """
+    x0, x1, y0, y1 = extent
+    nx, ny = shape
+    gx = (np.asarray(x, dtype=float) - x0) * (nx / (x1 - x0))
+    gy = (np.asarray(y, dtype=float) - y0) * (ny / (y1 - y0))
+    inside = (gx >= 0) & (gx < nx) & (gy >= 0) & (gy < ny)
+    flat = gy[inside].astype(np.int64) * nx + gx[inside].astype(np.int64)
+    counts = np.bincount(flat, minlength=nx * ny)
+    values = np.asarray(values, dtype=float)[inside]
+    finite = np.isfinite(values)
+    if finite.all():
+        means = np.bincount(flat, weights=values, minlength=nx * ny) / np.maximum(counts, 1)
+    else:
+        valued = np.bincount(flat[finite], minlength=nx * ny)
+        sums = np.bincount(flat[finite], weights=values[finite], minlength=nx * ny)
+        means = np.where(valued > 0, sums / np.maximum(valued, 1), np.where(counts > 0, np.nan, 0.0))
+    return counts.reshape(ny, nx), means.reshape(ny, nx)
+
+
+class DensityImage(AxesImage):
+    """Level-of-detail stand-in for a scatter collection.
+
+    While more than `threshold` points fall inside the current view, the
+    collection is hidden and the points are drawn as this image instead:
+    the view is cut into bins of `bin_px` screen pixels, each colored by
+    the mean color value of its points with the scatter's colormap and
+    norm (empty bins stay transparent). Zooming in until the view holds
+    `threshold` points or fewer brings the bubbles back.
+
+    Binning happens lazily at draw time and only when the points, view
+    limits or axes size changed, so the drawing cost is bounded by screen
+    resolution rather than by row count.
+
+    With a selection set, bins holding selected points are colored by the
+    mean of those points only and the other non-empty bins are drawn in
+    the scatter's gray for unselected rows, as the bubbles would be.
+    """
+
+    def __init__(self, ax, scatter, threshold=200_000, bin_px=3):
+        cmap = scatter.get_cmap().with_extremes(bad=(0, 0, 0, 0))
+        super().__init__(ax, cmap=cmap, norm=scatter.norm, origin='lower', interpolation='nearest',
+                         extent=(0, 1, 0, 1), transform=ax.transAxes)
+        self.set_alpha(scatter.get_alpha())
+        self.scatter = scatter
+        self.threshold = threshold
+        self.bin_px = bin_px
+        self.active = False
+        self._points = None
+        self._selected = None
+        self._key = None
+        self.set_data(np.ma.masked_all((1, 1)))
+        ax.add_image(self)
+
+    def set_points(self, x, y, values):
+        self._points = (np.asarray(x, dtype=float), np.asarray(y, dtype=float),
+                        np.asarray(values, dtype=float))
+        self._key = None
+        self.stale = True
+
+    def set_selection(self, selected):
+        """Highlight the bins of the rows in boolean mask `selected`; None
+        colors every bin."""
+        self._selected = selected
+        self._key = None
+        self.stale = True
+
+    def changed(self):
+        # Bins are colored when binned while a selection is shown, so a
+        # new norm or limits must rebin.
+        self._key = None
+        super().changed()
+
+    def draw(self, renderer):
+        self._update_level()
+        if self.active:
+            super().draw(renderer)
+
+    def _update_level(self):
+        ax = self.axes
+        key = (ax.viewLim.bounds, ax.bbox.bounds)
+        if self._points is None or key == self._key:
+            return
+        self._key = key
+        x, y, values = self._points
+        (x0, x1), (y0, y1) = sorted(ax.get_xlim()), sorted(ax.get_ylim())
+        in_view = np.count_nonzero((x >= x0) & (x <= x1) & (y >= y0) & (y <= y1))
+        self.active = self.threshold is not None and in_view > self.threshold
+        self.scatter.set_visible(not self.active)
+        if not self.active:
+            return
+        shape = (max(int(ax.bbox.width // self.bin_px), 1), max(int(ax.bbox.height // self.bin_px), 1))
+        counts, means = bin_points(x, y, values, (x0, x1, y0, y1), shape)
+        image = np.ma.masked_array(means, mask=counts == 0)
+        selected = self._selected
+        if selected is not None and len(selected) == len(x):
+            picked, picked_means = bin_points(x[selected], y[selected], values[selected],
+                                              (x0, x1, y0, y1), shape)
+            image = self.to_rgba(np.ma.masked_array(picked_means, mask=picked == 0))
+            image[(counts > 0) & (picked == 0)] = self.scatter.get_cmap().get_bad()
+        if ax.xaxis_inverted():
+            image = image[:, ::-1]
+        if ax.yaxis_inverted():
+            image = image[::-1]
+        self.set_data(image)
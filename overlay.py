@@ -0,0 +1,39 @@
+class BlitOverlay:
+    """Redraws a few animated artists (tooltips) over a cached canvas snapshot.
+
+    Artists added here are marked animated, so full draws skip them. After
+    every full draw the clean figure is copied once; `update` then restores
+    that copy, draws only the overlay artists and blits, instead of asking
+    the canvas to re-render every bubble, the colorbar and the legend.
+    """
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.artists = []
+        self._background = None
+        self.cid = canvas.mpl_connect('draw_event', self._on_draw)
+
+    def add(self, artist):
+        artist.set_animated(True)
+        self.artists.append(artist)
+        return artist
+
+    def disconnect(self):
+        self.canvas.mpl_disconnect(self.cid)
+
+    def update(self):
+        if self._background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._background)
+        self._draw_artists()
+        self.canvas.blit(self.canvas.figure.bbox)
+
+    def _on_draw(self, event):
+        self._background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist in self.artists:
+            if artist.get_visible():
+                self.canvas.figure.draw_artist(artist)
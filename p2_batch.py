@@ -0,0 +1,111 @@
+import argparse
+import itertools
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+
+from dataset import ColumnStore
+from p2_bubbles import ATTRIBUTES, draw_bubble_chart
+
+_store = None
+
+
+def combinations(x_attrs, y_attrs, size_attrs, color_attrs):
+    """Every (x, y, size, color) combination of the given attribute lists."""
+    return list(itertools.product(x_attrs, y_attrs, size_attrs, color_attrs))
+
+
+def read_combinations(path):
+    """(x, y, size, color) tuples from a file with one comma-separated combination per line."""
+    combos = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                combo = tuple(part.strip() for part in line.split(','))
+                if len(combo) != 4:
+                    raise ValueError(f'{path}: expected x,y,size,color, got {line!r}')
+                combos.append(combo)
+    return combos
+
+
+def chart_filename(combo, fmt):
+    return '__'.join(re.sub(r'[^\w.-]+', '_', attr) for attr in combo) + f'.{fmt}'
+
+
+def _init_worker(path, columns):
+    # Forked workers inherit the parent's store; spawned ones memory-map
+    # the sidecar cache the parent wrote, so the CSV is parsed only once.
+    global _store
+    if _store is None:
+        _store = ColumnStore.from_csv(path, usecols=columns)
+
+
+def render_chart(combo, out_path, dpi=100, lod_threshold=200_000):
+    """Render one chart from the worker's store to `out_path`; returns seconds taken."""
+    start = time.perf_counter()
+    fig = Figure(figsize=(12, 8))
+    draw_bubble_chart(fig, _store, *combo, lod_threshold=lod_threshold)
+    fig.savefig(out_path, dpi=dpi)
+    return time.perf_counter() - start
+
+
+def render_batch(path, combos, out_dir, fmt='png', jobs=None, dpi=100, lod_threshold=200_000):
+    """Render every combination in parallel; returns (paths, elapsed seconds).
+
+    The dataset is loaded once here, restricted to the columns the
+    combinations use, and shared with the worker processes (inherited
+    when forking, memory-mapped from the sidecar cache otherwise).
+    """
+    global _store
+    columns = sorted({attr for combo in combos for attr in combo})
+    _store = ColumnStore.from_csv(path, usecols=columns)
+    os.makedirs(out_dir, exist_ok=True)
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    start = time.perf_counter()
+    paths = []
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context,
+                             initializer=_init_worker, initargs=(path, columns)) as pool:
+        futures = {pool.submit(render_chart, combo, os.path.join(out_dir, chart_filename(combo, fmt)),
+                               dpi, lod_threshold): combo for combo in combos}
+        for future in as_completed(futures):
+            future.result()
+            paths.append(os.path.join(out_dir, chart_filename(futures[future], fmt)))
+    return paths, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Render bubble charts for many attribute combinations.')
+    parser.add_argument('-i', '--input', type=str, required=True, help='Input CSV filename')
+    parser.add_argument('-o', '--output', type=str, default='charts', help='Output directory')
+    parser.add_argument('--combinations', type=str, default=None,
+                        help='File with one x,y,size,color combination per line')
+    parser.add_argument('-x', type=str, default=ATTRIBUTES[0], help='Comma-separated x attributes')
+    parser.add_argument('-y', type=str, default=ATTRIBUTES[1], help='Comma-separated y attributes')
+    parser.add_argument('-s', '--size', type=str, default=ATTRIBUTES[2], help='Comma-separated size attributes')
+    parser.add_argument('-c', '--color', type=str, default=ATTRIBUTES[3], help='Comma-separated color attributes')
+    parser.add_argument('-f', '--format', choices=('png', 'svg'), default='png')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--dpi', type=int, default=100)
+    parser.add_argument('--lod-threshold', type=int, default=200_000,
+                        help='Draw a density image instead of bubbles above this many visible points')
+    args = parser.parse_args()
+
+    if args.combinations:
+        combos = read_combinations(args.combinations)
+    else:
+        combos = combinations(args.x.split(','), args.y.split(','), args.size.split(','), args.color.split(','))
+    try:
+        paths, elapsed = render_batch(args.input, combos, args.output, args.format, args.jobs,
+                                      args.dpi, args.lod_threshold)
+    except ValueError as exc:
+        parser.error(str(exc))
+    print(f'{len(paths)} charts in {elapsed:.2f} s ({len(paths) / elapsed:.2f} charts/s) -> {args.output}')
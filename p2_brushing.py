@@ -1,50 +1,43 @@
 import sys
-import pandas as pd
-import numpy as np
 import argparse
-from matplotlib.backends.backend_qtagg import FigureCanvas
 from matplotlib.backends.backend_qtagg import NavigationToolbar2QT as NavigationToolbar
-from matplotlib.figure import Figure
 from PyQt6 import QtCore, QtWidgets
-from PyQt6.QtWidgets import QComboBox, QSlider, QLabel, QVBoxLayout, QHBoxLayout, QWidget
-from matplotlib.widgets import RectangleSelector
-
-class Brush:
-    def __init__(self, xs, ys, ax, callback, canvas, color='red', alpha=0.6, edgecolor='black'):
-        self.df = pd.DataFrame({'x': xs, 'y': ys})
-        self.callback = callback
-        self.ax = ax
-        self.canvas = canvas
-        self.rec = RectangleSelector(ax, self.onselect, useblit=True, interactive=True)
-
-    def onselect(self, eclick, erelease):
-        x1, y1 = eclick.xdata, eclick.ydata
-        x2, y2 = erelease.xdata, erelease.ydata
-        selected = self.df[(self.df['x'].between(x1, x2)) & (self.df['y'].between(y1, y2))]
-        self.callback(selected.index.tolist())  
-
-        self.canvas.draw_idle() 
+from PyQt6.QtWidgets import QComboBox, QSlider, QLabel, QVBoxLayout, QHBoxLayout, QWidget, QPushButton, QProgressBar
+from dataset import ColumnStore
+from qtchart import RENDERERS, ViewBrush, create_chart
+from views import ViewInvalidator
+from scheduler import RenderScheduler
+from loader import CsvLoader
+from prepare import SCALE_MODES, Preparer, prepare_chart
+from connections import ConnectionRegistry
+import tracing
+from sharing import SelectionBus
+from selection import BRUSH_MODES, Brush, SelectionModel
+from p2_splom import ScatterMatrixWindow
 
 
 class LinkedBubbleChartApp(QtWidgets.QMainWindow):
-    def __init__(self, dataset):
+    def __init__(self, dataset, frame_times=False, follow=False, follow_ms=1000, share=False,
+                 renderer='matplotlib'):
         super().__init__()
 
-        self.dataset = pd.read_csv(dataset)
-        self.attributes = self.dataset.columns.tolist()
+        self.data = ColumnStore()
+        self.attributes = []
         self.main_widget = QWidget(self)
         self.setCentralWidget(self.main_widget)
         self.layout = QVBoxLayout(self.main_widget)
 
-        self.canvas1 = FigureCanvas(Figure(figsize=(6, 6)))
-        self.ax1 = self.canvas1.figure.subplots()
-
-        self.canvas2 = FigureCanvas(Figure(figsize=(6, 6)))
-        self.ax2 = self.canvas2.figure.subplots()
+        self.renderer = renderer
+        self.canvas1, self.chart1 = create_chart(renderer, legend_color='gray')
+        self.canvas2, self.chart2 = create_chart(renderer, legend_color='gray')
         chart_layout = QHBoxLayout()
-        chart_layout.addWidget(NavigationToolbar(self.canvas1, self))
+        if renderer == 'matplotlib':
+            self.ax1 = self.chart1.ax
+            self.ax2 = self.chart2.ax
+            chart_layout.addWidget(NavigationToolbar(self.canvas1, self))
         chart_layout.addWidget(self.canvas1)
-        chart_layout.addWidget(NavigationToolbar(self.canvas2, self))
+        if renderer == 'matplotlib':
+            chart_layout.addWidget(NavigationToolbar(self.canvas2, self))
         chart_layout.addWidget(self.canvas2)
         self.layout.addLayout(chart_layout)
 
@@ -88,36 +81,84 @@ class LinkedBubbleChartApp(QtWidgets.QMainWindow):
         
         self.layout.addLayout(self.controls_layout2)
 
-        for attr in self.attributes:
-            self.x_dropdown1.addItem(attr)
-            self.y_dropdown1.addItem(attr)
-            self.radius_dropdown1.addItem(attr)
-            self.color_dropdown1.addItem(attr)
-
-            self.x_dropdown2.addItem(attr)
-            self.y_dropdown2.addItem(attr)
-            self.radius_dropdown2.addItem(attr)
-            self.color_dropdown2.addItem(attr)
-
-        self.x_dropdown1.currentIndexChanged.connect(self.update_plot)
-        self.y_dropdown1.currentIndexChanged.connect(self.update_plot)
-        self.radius_dropdown1.currentIndexChanged.connect(self.update_plot)
-        self.color_dropdown1.currentIndexChanged.connect(self.update_plot)
-        self.size_slider1.valueChanged.connect(self.update_plot)
-
-        self.x_dropdown2.currentIndexChanged.connect(self.update_plot)
-        self.y_dropdown2.currentIndexChanged.connect(self.update_plot)
-        self.radius_dropdown2.currentIndexChanged.connect(self.update_plot)
-        self.color_dropdown2.currentIndexChanged.connect(self.update_plot)
-        self.size_slider2.valueChanged.connect(self.update_plot)
-
-        self.brush1 = None
-        self.brush2 = None
-
-        self.selected_indices_chart1 = []
-        self.selected_indices_chart2 = []
-
-        self.update_plot()
+        self.selection_layout = QHBoxLayout()
+        self.selection_layout.addWidget(QLabel('Combine brushes:'))
+        self.selection_mode = self.add_dropdown(self.selection_layout)
+        self.selection_mode.addItems(SelectionModel.modes)
+        self.selection_layout.addWidget(QLabel('Brush:'))
+        self.brush_tool = self.add_dropdown(self.selection_layout)
+        self.brush_tool.addItems(Brush.tools)
+        self.selection_layout.addWidget(QLabel('Brush mode:'))
+        self.brush_mode = self.add_dropdown(self.selection_layout)
+        self.brush_mode.addItems(BRUSH_MODES)
+        self.selection_layout.addWidget(QLabel('Size scaling:'))
+        self.size_mode = self.add_dropdown(self.selection_layout)
+        self.size_mode.addItems(SCALE_MODES)
+        self.selection_layout.addWidget(QLabel('Color scaling:'))
+        self.color_mode = self.add_dropdown(self.selection_layout)
+        self.color_mode.addItems(SCALE_MODES)
+        self.splom_button = QPushButton('Scatterplot matrix')
+        self.selection_layout.addWidget(self.splom_button)
+        self.selection_layout.addStretch()
+        self.layout.addLayout(self.selection_layout)
+
+        self.preparer = Preparer(parent=self)
+        self.scheduler = RenderScheduler(
+            self.update_plot, parent=self,
+            interacting=lambda: self.size_slider1.isSliderDown() or self.size_slider2.isSliderDown())
+        self.x_dropdown1.currentIndexChanged.connect(self.scheduler.request)
+        self.y_dropdown1.currentIndexChanged.connect(self.scheduler.request)
+        self.radius_dropdown1.currentIndexChanged.connect(self.scheduler.request)
+        self.color_dropdown1.currentIndexChanged.connect(self.scheduler.request)
+        self.size_slider1.valueChanged.connect(self.scheduler.request)
+
+        self.x_dropdown2.currentIndexChanged.connect(self.scheduler.request)
+        self.y_dropdown2.currentIndexChanged.connect(self.scheduler.request)
+        self.radius_dropdown2.currentIndexChanged.connect(self.scheduler.request)
+        self.color_dropdown2.currentIndexChanged.connect(self.scheduler.request)
+        self.size_slider2.valueChanged.connect(self.scheduler.request)
+        self.size_mode.currentIndexChanged.connect(self.scheduler.request)
+        self.color_mode.currentIndexChanged.connect(self.scheduler.request)
+
+        self.charts = {1: self.chart1, 2: self.chart2}
+        self.canvases = {1: self.canvas1, 2: self.canvas2}
+        self.chart_controls = {
+            1: (self.x_dropdown1, self.y_dropdown1, self.radius_dropdown1, self.color_dropdown1, self.size_slider1),
+            2: (self.x_dropdown2, self.y_dropdown2, self.radius_dropdown2, self.color_dropdown2, self.size_slider2),
+        }
+        self.brush_callbacks = {1: self.brush_callback_chart1, 2: self.brush_callback_chart2}
+        self.brushes = {1: None, 2: None}
+        self.connections = ConnectionRegistry()
+
+        self.selection = SelectionModel(0)
+        self.bus = SelectionBus(self.selection, dataset, parent=self) if share else None
+        self.selection.subscribe(self.apply_selection)
+        self.selection_mode.currentTextChanged.connect(self.selection.set_mode)
+        self.brush_tool.currentTextChanged.connect(self.set_brush_tool)
+        self.brush_mode.currentTextChanged.connect(self.set_brush_mode)
+        self.splom_button.clicked.connect(self.open_splom)
+        self.splom_button.setEnabled(False)
+        self.splom_window = None
+
+        for n, canvas in self.canvases.items():
+            tracing.instrument_canvas(canvas, chart=n)
+            if frame_times:
+                tracing.frame_time_label(canvas)
+
+        self.views = ViewInvalidator()
+        for n in self.charts:
+            self.views.add_view(n, lambda n=n: self.chart_inputs(n),
+                                lambda changed, preview, n=n: self.render_chart(n, changed, preview))
+
+        self.progress = QProgressBar()
+        self.statusBar().addPermanentWidget(self.progress)
+        self.loader = CsvLoader(dataset, self.data, follow=follow, follow_ms=follow_ms, parent=self)
+        self.loader.progress.connect(self.progress.setValue)
+        self.loader.updated.connect(self.data_updated)
+        self.loader.finished.connect(self.loading_finished)
+        self.loader.failed.connect(self.statusBar().showMessage)
+        self.preparer.failed.connect(self.statusBar().showMessage)
+        self.loader.start()
 
 
     def add_dropdown(self, layout):
@@ -133,125 +174,140 @@ class LinkedBubbleChartApp(QtWidgets.QMainWindow):
         layout.addWidget(slider)
         return slider
 
-    def brush_callback_chart1(self, selected):
-        self.selected_indices_chart1 = selected
-        self.update_plot()
+    def open_splom(self):
+        if self.splom_window is None:
+            self.splom_window = ScatterMatrixWindow(self.data, self.selection)
+        self.splom_window.show()
 
-    def brush_callback_chart2(self, selected):
-        self.selected_indices_chart2 = selected
-        self.update_plot()
+    def apply_selection(self, mask):
+        for n, chart in self.charts.items():
+            chart.set_selection(mask)
+            self.canvases[n].draw_idle()
+
+    def set_brush_tool(self, tool):
+        for brush in self.brushes.values():
+            if brush:
+                brush.set_tool(tool)
 
-    def update_plot(self):
-        x_attr1 = self.x_dropdown1.currentText()
-        y_attr1 = self.y_dropdown1.currentText()
-        radius_attr1 = self.radius_dropdown1.currentText()
-        color_attr1 = self.color_dropdown1.currentText()
+    def set_brush_mode(self, mode):
+        for brush in self.brushes.values():
+            if brush:
+                brush.set_mode(mode)
 
-        x_attr2 = self.x_dropdown2.currentText()
-        y_attr2 = self.y_dropdown2.currentText()
-        radius_attr2 = self.radius_dropdown2.currentText()
-        color_attr2 = self.color_dropdown2.currentText()
+    def brush_callback_chart1(self, selected):
+        self.selection.set('chart1', selected)
 
-        if not (x_attr1 and y_attr1 and radius_attr1 and color_attr1):
+    def brush_callback_chart2(self, selected):
+        self.selection.set('chart2', selected)
+
+    def chart_inputs(self, n):
+        x_dropdown, y_dropdown, radius_dropdown, color_dropdown, size_slider = self.chart_controls[n]
+        return {
+            'x': x_dropdown.currentText(),
+            'y': y_dropdown.currentText(),
+            'size': radius_dropdown.currentText(),
+            'color': color_dropdown.currentText(),
+            'scale': size_slider.value(),
+            'size_mode': self.size_mode.currentText(),
+            'color_mode': self.color_mode.currentText(),
+        }
+
+    def closeEvent(self, event):
+        self.loader.cancel()
+        self.preparer.shutdown()
+        if self.bus is not None:
+            self.bus.close()
+        super().closeEvent(event)
+
+    def data_updated(self):
+        if not self.attributes:
+            self.attributes = self.data.columns
+            for attr in self.attributes:
+                self.x_dropdown1.addItem(attr)
+                self.y_dropdown1.addItem(attr)
+                self.radius_dropdown1.addItem(attr)
+                self.color_dropdown1.addItem(attr)
+
+                self.x_dropdown2.addItem(attr)
+                self.y_dropdown2.addItem(attr)
+                self.radius_dropdown2.addItem(attr)
+                self.color_dropdown2.addItem(attr)
+        self.selection.resize(len(self.data))
+        if self.bus is not None:
+            self.bus.reapply()
+        for n in self.charts:
+            self.views.invalidate(n)
+        self.scheduler.flush()
+
+    def loading_finished(self):
+        self.progress.hide()
+        self.splom_button.setEnabled(True)
+
+    def update_plot(self, preview=False):
+        for controls in self.chart_controls.values():
+            if not all(dropdown.currentText() for dropdown in controls[:4]):
+                return
+        self.views.flush(preview=preview)
+
+    def render_chart(self, n, changed, preview=False):
+        inputs = self.chart_inputs(n)
+        x_attr, y_attr = inputs['x'], inputs['y']
+        radius_attr, color_attr = inputs['size'], inputs['color']
+        size_scale = inputs['scale']
+        size_mode, color_mode = inputs['size_mode'], inputs['color_mode']
+        rows = self.selection.n_rows
+        self.preparer.submit(
+            n,
+            lambda: prepare_chart(self.data, x_attr, y_attr, radius_attr, color_attr, size_scale, rows,
+                                  size_mode, color_mode),
+            lambda prepared: self.show_chart(n, prepared, inputs, preview))
+
+    def show_chart(self, n, prepared, inputs, preview=False):
+        if len(prepared['x']) != self.selection.n_rows:
             return
-        if not (x_attr2 and y_attr2 and radius_attr2 and color_attr2):
+        x_attr, y_attr, color_attr = inputs['x'], inputs['y'], inputs['color']
+        self.charts[n].render(**prepared, x_label=x_attr, y_label=y_attr, color_label=color_attr,
+                              title=f'Bubble Chart {n}: {x_attr} vs {y_attr}', selected=self.selection.mask,
+                              preview=preview)
+        if preview:
             return
-
-        size_scale1 = self.size_slider1.value()
-        size_scale2 = self.size_slider2.value()
-
-        self.canvas1.figure.clf()  
-        self.canvas2.figure.clf() 
-
-        self.ax1 = self.canvas1.figure.add_subplot(111)
-        self.ax2 = self.canvas2.figure.add_subplot(111)
-
-        x1 = pd.to_numeric(self.dataset[x_attr1], errors='coerce').fillna(0)
-        y1 = pd.to_numeric(self.dataset[y_attr1], errors='coerce').fillna(0)
-        radius1 = pd.to_numeric(self.dataset[radius_attr1], errors='coerce').fillna(1)
-        color1 = pd.to_numeric(self.dataset[color_attr1], errors='coerce').fillna(0)
-
-        x2 = pd.to_numeric(self.dataset[x_attr2], errors='coerce').fillna(0)
-        y2 = pd.to_numeric(self.dataset[y_attr2], errors='coerce').fillna(0)
-        radius2 = pd.to_numeric(self.dataset[radius_attr2], errors='coerce').fillna(1)
-        color2 = pd.to_numeric(self.dataset[color_attr2], errors='coerce').fillna(0)
-
-        scaled_radius1 = radius1 * size_scale1 / radius1.max()
-        scaled_radius2 = radius2 * size_scale2 / radius2.max()
-        max_val1 = radius1.max()
-        min_val1 = radius1.min()
-        legend_sizes1 = np.linspace(min_val1, max_val1, 3) 
-        legend_bubbles1 = legend_sizes1 * size_scale1 / max_val1
-
-        for size, scaled_size in zip(legend_sizes1, legend_bubbles1):
-            self.ax1.scatter([], [], s=scaled_size, c='gray', alpha=0.6, label=f'{size:.1f}')
-
-        self.ax1.legend(scatterpoints=1, frameon=True, labelspacing=1, title="Bubble Size", loc="upper right")
-
-        if self.selected_indices_chart1:
-            selected_mask1 = np.zeros_like(x1, dtype=bool)
-            selected_mask1[self.selected_indices_chart1] = True
+        self.views.rendered(n, inputs)
+
+        x, y = prepared['x'], prepared['y']
+        if self.brushes[n]:
+            self.brushes[n].update_coords(x, y)
+        elif self.renderer == 'matplotlib':
+            self.brushes[n] = self.connections.brush(
+                f'brush{n}', Brush(x, y, self.charts[n].ax, self.brush_callbacks[n], self.canvases[n],
+                                  tool=self.brush_tool.currentText(), mode=self.brush_mode.currentText()))
         else:
-            selected_mask1 = np.ones_like(x1, dtype=bool)
+            self.brushes[n] = self.connections.brush(
+                f'brush{n}', ViewBrush(x, y, self.charts[n], self.brush_callbacks[n],
+                                      tool=self.brush_tool.currentText(), mode=self.brush_mode.currentText()))
 
-        # If there are selected indices for chart 2, use them to highlight data points
-        if self.selected_indices_chart2:
-            selected_mask2 = np.zeros_like(x2, dtype=bool)
-            selected_mask2[self.selected_indices_chart2] = True
-        else:
-            selected_mask2 = np.ones_like(x2, dtype=bool)
-        
-        max_val2 = radius2.max()
-        min_val2 = radius2.min()
-        legend_sizes2 = np.linspace(min_val2, max_val2, 3)  
-        legend_bubbles2 = legend_sizes2 * size_scale2 / max_val2
-
-        for size, scaled_size in zip(legend_sizes2, legend_bubbles2):
-            self.ax2.scatter([], [], s=scaled_size, c='gray', alpha=0.6, label=f'{size:.1f}')
-
-        self.ax2.legend(scatterpoints=1, frameon=True, labelspacing=1, title="Bubble Size", loc="upper right")
-
-
-        self.ax1.scatter(x1[~selected_mask1], y1[~selected_mask1], s=scaled_radius1[~selected_mask1],
-                         c='gray', alpha=0.4)
-        scatter1 = self.ax1.scatter(x1[selected_mask1], y1[selected_mask1], s=scaled_radius1[selected_mask1],
-                                    c=color1[selected_mask1], alpha=0.6, cmap='viridis')
-        self.ax1.set_xlabel(x_attr1)
-        self.ax1.set_ylabel(y_attr1)
-        self.ax1.set_title(f'Bubble Chart 1: {x_attr1} vs {y_attr1}')
-        self.colorbar1 = self.canvas1.figure.colorbar(scatter1, ax=self.ax1, label=color_attr1)
-
-        self.ax2.scatter(x2[~selected_mask2], y2[~selected_mask2], s=scaled_radius2[~selected_mask2],
-                         c='gray', alpha=0.4)
-        scatter2 = self.ax2.scatter(x2[selected_mask2], y2[selected_mask2], s=scaled_radius2[selected_mask2],
-                                    c=color2[selected_mask2], alpha=0.6, cmap='viridis')
-        self.ax2.set_xlabel(x_attr2)
-        self.ax2.set_ylabel(y_attr2)
-        self.ax2.set_title(f'Bubble Chart 2: {x_attr2} vs {y_attr2}')
-        self.colorbar2 = self.canvas2.figure.colorbar(scatter2, ax=self.ax2, label=color_attr2)
-
-        if self.brush1:
-            self.brush1.rec.disconnect_events()
-        self.brush1 = Brush(x1, y1, self.ax1, self.brush_callback_chart1, self.canvas1)
-
-        if self.brush2:
-            self.brush2.rec.disconnect_events()
-        self.brush2 = Brush(x2, y2, self.ax2, self.brush_callback_chart2, self.canvas2)
-
-        self.canvas1.figure.tight_layout()
-        self.canvas2.figure.tight_layout()
-
-        
-        self.canvas1.draw_idle()
-        self.canvas2.draw_idle()
+        self.canvases[n].draw_idle()
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Linked Brushing Bubble Charts')
     parser.add_argument('-i', '--input', type=str, required=True, help='Path to the input CSV file')
+    parser.add_argument('--trace', type=str, default=None,
+                        help='Record render stage timings and write them as a Chrome trace to this file on exit')
+    parser.add_argument('--follow', action='store_true',
+                        help='Keep watching the input and add rows appended to it')
+    parser.add_argument('--follow-ms', type=int, default=1000,
+                        help='How often to check a followed input for new rows, in milliseconds')
+    parser.add_argument('--share', action='store_true',
+                        help='Share brushed selections with other windows showing the same file')
+    parser.add_argument('--renderer', choices=RENDERERS, default='matplotlib',
+                        help='Draw the charts with matplotlib or natively with QPainter')
+    parser.add_argument('--frame-times', action='store_true', help='Show the latest stage timings over the charts')
     args = parser.parse_args()
+    if args.trace or args.frame_times:
+        tracing.enable(args.trace)
 
     app = QtWidgets.QApplication(sys.argv)
-    window = LinkedBubbleChartApp(args.input)
+    window = LinkedBubbleChartApp(args.input, frame_times=args.frame_times, follow=args.follow,
+                                  follow_ms=args.follow_ms, share=args.share, renderer=args.renderer)
     window.show()
     sys.exit(app.exec())
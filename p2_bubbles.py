@@ -1,55 +1,71 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 import argparse
+from lod import DensityImage
+from dataset import ColumnStore
 
-def create_bubble_chart(df):
-    x_attr = "GDP_per_capita"
-    y_attr = "military_expenditures"
-    size_attr = "population"
-    color_attr = "life_expectancy"
+ATTRIBUTES = ("GDP_per_capita", "military_expenditures", "population", "life_expectancy")
+
+# Legend title and bubble values for size attributes with well-known ranges;
+# any other attribute gets its own name and its min, mid and max values.
+SIZE_LEGENDS = {"population": ("Population", [1e5, 1e7, 1e9])}
+
+def draw_bubble_chart(fig, df, x_attr, y_attr, size_attr, color_attr, lod_threshold=200_000):
+    """Draw one bubble chart into `fig`; `df` is a DataFrame or ColumnStore."""
+    ax = fig.add_subplot(111)
 
     x = df[x_attr]
     y = df[y_attr]
     
-    min_val = df[size_attr].min()
-    max_val = df[size_attr].max()
+    if isinstance(df, ColumnStore):
+        min_val, max_val = df.stats(size_attr).range()
+    else:
+        min_val, max_val = np.nanmin(df[size_attr]), np.nanmax(df[size_attr])
     value_range = max_val - min_val 
 
     min_size = 50 
     max_size = 700  
     size_range = max_size - min_size 
     
-    K = size_range / value_range 
+    K = size_range / value_range if value_range else 0.0
     sizes = min_size + K * (df[size_attr] - min_val)
     colors = df[color_attr]
 
-    plt.figure(figsize=(12, 8))
-    
-    scatter = plt.scatter(x, y, s=sizes, c=colors, cmap='viridis', alpha=0.6, edgecolors="black", linewidth=0.5)
+    scatter = ax.scatter(x, y, s=sizes, c=colors, cmap='viridis', alpha=0.6, edgecolors="black", linewidth=0.5)
 
-    cbar = plt.colorbar(scatter)
+    if lod_threshold is not None:
+        density = DensityImage(ax, scatter, lod_threshold)
+        density.set_points(x, y, colors)
+
+    cbar = fig.colorbar(scatter, ax=ax)
     cbar.set_label(color_attr)
 
-    legend_sizes = [1e5, 1e7, 1e9] 
+    legend_title, legend_sizes = SIZE_LEGENDS.get(size_attr, (size_attr, np.linspace(min_val, max_val, 3)))
     legend_bubbles = [min_size + K * (s - min_val) for s in legend_sizes]
     
     for size, legend_bubble in zip(legend_sizes, legend_bubbles):
-        plt.scatter([], [], s=legend_bubble, c='white', alpha=0.6, edgecolors="black", label=f'{size:.1e}')
+        ax.scatter([], [], s=legend_bubble, c='white', alpha=0.6, edgecolors="black", label=f'{size:.1e}')
     
-    plt.legend(scatterpoints=1, frameon=True, labelspacing=1, title='Population')
+    ax.legend(scatterpoints=1, frameon=True, labelspacing=1, title=legend_title)
+
+    ax.set_xlabel(x_attr, weight='bold')
+    ax.set_ylabel(y_attr, weight='bold')
+    ax.set_title(f'{x_attr}, {y_attr}, {size_attr}, {color_attr}', weight='bold')
+    return ax
 
-    plt.xlabel(x_attr, weight='bold')
-    plt.ylabel(y_attr, weight='bold')
-    plt.title(f'{x_attr}, {y_attr}, {size_attr}, {color_attr}', weight='bold')
+def create_bubble_chart(df, attributes=ATTRIBUTES, lod_threshold=200_000):
+    fig = plt.figure(figsize=(12, 8))
+    draw_bubble_chart(fig, df, *attributes, lod_threshold=lod_threshold)
 
     plt.show()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Generate a bubble chart from a CSV dataset.')
     parser.add_argument('-i', '--input', type=str, required=True, help='Input CSV filename')  # Only input is required now
+    parser.add_argument('--lod-threshold', type=int, default=200_000,
+                        help='Draw a density image instead of bubbles above this many visible points')
     args = parser.parse_args()
 
-    df = pd.read_csv(args.input)
+    data = ColumnStore.from_csv(args.input, usecols=list(ATTRIBUTES))
     
-    create_bubble_chart(df)
+    create_bubble_chart(data, lod_threshold=args.lod_threshold)
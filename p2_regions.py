@@ -0,0 +1,250 @@
+"""Region overview with drill-down into the rows of one region.
+
+Raw rows are not loaded per group: the group aggregates behind the
+overview need every row anyway, so the CSV is streamed once into a
+ColumnStore as in the other apps. What stays per group is the work done
+on the rows. The overview reads only the aggregates, and expanding a
+group prepares and draws just that group's rows by index; once the
+sidecar cache is written the columns are memory-mapped, so only the
+pages holding those rows are read.
+"""
+import sys
+import argparse
+import numpy as np
+from matplotlib.backends.backend_qtagg import FigureCanvas
+from matplotlib.backends.backend_qtagg import NavigationToolbar2QT as NavigationToolbar
+from matplotlib.figure import Figure
+from PyQt6 import QtCore, QtWidgets
+from PyQt6.QtWidgets import QComboBox, QSlider, QLabel, QVBoxLayout, QHBoxLayout, QWidget, QPushButton, QProgressBar
+from dataset import ColumnStore
+from chart import BubbleChart
+from scheduler import RenderScheduler
+from loader import CsvLoader
+from prepare import Preparer, prepare_chart
+import tracing
+from tracing import traced
+
+DEFAULT_ATTRIBUTES = ("GDP_per_capita", "life_expectancy", "population", "birth_rate")
+
+# Bubble area of the largest group at slider value 1, in points^2.
+GROUP_BUBBLE_SCALE = 40
+
+
+@traced('prepare_groups', 'prepare')
+def prepare_groups(store, by, x_attr, y_attr, size_attr, color_attr, size_scale):
+    """Render-ready arrays with one bubble per group of `by`.
+
+    Bubbles sit at the group means of `x_attr` and `y_attr`, are sized by
+    the group total of `size_attr` and colored by the group mean of
+    `color_attr`. Everything comes from the store's precomputed group
+    aggregates, so the cost depends on the number of groups, not rows.
+    Groups without x or y values are left out; `rows` holds the group
+    number of each bubble and `labels` its name.
+    """
+    groups = store.groups(by)
+    x, y = groups.mean(x_attr), groups.mean(y_attr)
+    totals, colors = groups.sum(size_attr), groups.mean(color_attr)
+    shown = np.flatnonzero((groups.size > 0) & ~np.isnan(x) & ~np.isnan(y))
+    x, y, totals, colors = x[shown], y[shown], totals[shown], colors[shown]
+    colors = np.where(np.isnan(colors), 0.0, colors)
+
+    top = totals.max() if len(totals) and totals.max() > 0 else 1.0
+    scale = size_scale * GROUP_BUBBLE_SCALE / top
+    legend_sizes = np.linspace(totals.min(), top, 3) if len(totals) else np.zeros(3)
+    return {
+        'x': x,
+        'y': y,
+        'sizes': np.maximum(totals, 0) * scale,
+        'colors': colors,
+        'legend_sizes': legend_sizes,
+        'legend_bubbles': np.maximum(legend_sizes, 0) * scale,
+        'color_limits': (colors.min(), colors.max()) if len(colors) else None,
+        'rows': shown,
+        'labels': [groups.labels[g] for g in shown],
+    }
+
+
+class RegionBubbleApp(QtWidgets.QMainWindow):
+    """One bubble per region that drills down into the region's rows.
+
+    The overview is drawn from the store's group aggregates; clicking a
+    bubble prepares and draws only that group's rows, and 'All groups'
+    goes back to the overview.
+    """
+
+    def __init__(self, dataset, lod_threshold=200_000, frame_times=False, follow=False, follow_ms=1000):
+        super().__init__()
+
+        self.data = ColumnStore()
+        self.attributes = []
+        self.expanded = None
+        self.group_labels = []
+        self.main_widget = QWidget(self)
+        self.setCentralWidget(self.main_widget)
+        self.layout = QVBoxLayout(self.main_widget)
+
+        self.canvas = FigureCanvas(Figure(figsize=(6, 6)))
+        self.chart = BubbleChart(self.canvas.figure, legend_color='white', lod_threshold=lod_threshold)
+        self.ax = self.chart.ax
+        tracing.instrument_canvas(self.canvas)
+        if frame_times:
+            tracing.frame_time_label(self.canvas)
+        self.toolbar = NavigationToolbar(self.canvas, self)
+        self.layout.addWidget(self.toolbar)
+        self.layout.addWidget(self.canvas)
+
+        self.group_dropdown = QComboBox(self)
+        self.x_dropdown = QComboBox(self)
+        self.y_dropdown = QComboBox(self)
+        self.radius_dropdown = QComboBox(self)
+        self.color_dropdown = QComboBox(self)
+
+        self.size_slider = QSlider(QtCore.Qt.Orientation.Horizontal)
+        self.size_slider.setMinimum(1)
+        self.size_slider.setMaximum(100)
+        self.size_slider.setValue(10)
+
+        self.back_button = QPushButton('All groups')
+        self.back_button.setEnabled(False)
+
+        controls_layout = QHBoxLayout()
+        controls_layout.addWidget(QLabel('Group by:'))
+        controls_layout.addWidget(self.group_dropdown)
+        controls_layout.addWidget(QLabel('X:'))
+        controls_layout.addWidget(self.x_dropdown)
+        controls_layout.addWidget(QLabel('Y:'))
+        controls_layout.addWidget(self.y_dropdown)
+        controls_layout.addWidget(QLabel('Size:'))
+        controls_layout.addWidget(self.radius_dropdown)
+        controls_layout.addWidget(QLabel('Color:'))
+        controls_layout.addWidget(self.color_dropdown)
+        controls_layout.addWidget(QLabel('Bubble Size Scale:'))
+        controls_layout.addWidget(self.size_slider)
+        controls_layout.addWidget(self.back_button)
+
+        self.layout.addLayout(controls_layout)
+
+        self.preparer = Preparer(parent=self)
+        self.scheduler = RenderScheduler(self.update_plot, interacting=self.size_slider.isSliderDown, parent=self)
+        self.group_dropdown.currentIndexChanged.connect(self.collapse)
+        self.x_dropdown.currentIndexChanged.connect(self.scheduler.request)
+        self.y_dropdown.currentIndexChanged.connect(self.scheduler.request)
+        self.radius_dropdown.currentIndexChanged.connect(self.scheduler.request)
+        self.color_dropdown.currentIndexChanged.connect(self.scheduler.request)
+        self.size_slider.valueChanged.connect(self.scheduler.request)
+        self.back_button.clicked.connect(self.collapse)
+        self.canvas.mpl_connect('button_press_event', self.on_click)
+
+        self.progress = QProgressBar()
+        self.statusBar().addPermanentWidget(self.progress)
+        self.loader = CsvLoader(dataset, self.data, follow=follow, follow_ms=follow_ms, parent=self)
+        self.loader.progress.connect(self.progress.setValue)
+        self.loader.updated.connect(self.data_updated)
+        self.loader.finished.connect(self.progress.hide)
+        self.loader.failed.connect(self.statusBar().showMessage)
+        self.preparer.failed.connect(self.statusBar().showMessage)
+        self.loader.start()
+
+    def closeEvent(self, event):
+        self.loader.cancel()
+        self.preparer.shutdown()
+        super().closeEvent(event)
+
+    def data_updated(self):
+        if not self.attributes:
+            self.attributes = [name for name in self.data.columns if self.data.kinds[name] == 'number']
+            groupings = [name for name in self.data.columns if self.data.kinds[name] == 'text']
+            self.group_dropdown.addItems(groupings)
+            if 'region' in groupings:
+                self.group_dropdown.setCurrentText('region')
+            for dropdown, default in zip((self.x_dropdown, self.y_dropdown, self.radius_dropdown,
+                                          self.color_dropdown), DEFAULT_ATTRIBUTES):
+                dropdown.addItems(self.attributes)
+                if default in self.attributes:
+                    dropdown.setCurrentText(default)
+        self.scheduler.flush()
+
+    def collapse(self):
+        self.expanded = None
+        self.back_button.setEnabled(False)
+        self.scheduler.request()
+
+    def on_click(self, event):
+        if self.expanded is not None or event.inaxes != self.ax or self.toolbar.mode:
+            return
+        group = self.chart.hits.query(event.x, event.y)
+        if group is not None:
+            self.expanded = group
+            self.back_button.setEnabled(True)
+            self.scheduler.request()
+
+    def update_plot(self, preview=False):
+        by = self.group_dropdown.currentText()
+        x_attr = self.x_dropdown.currentText()
+        y_attr = self.y_dropdown.currentText()
+        radius_attr = self.radius_dropdown.currentText()
+        color_attr = self.color_dropdown.currentText()
+
+        if not (by and x_attr and y_attr and radius_attr and color_attr):
+            return
+
+        size_scale = self.size_slider.value()
+        expanded = self.expanded
+        if expanded is None:
+            work = lambda: prepare_groups(self.data, by, x_attr, y_attr, radius_attr, color_attr, size_scale)
+        else:
+            def work():
+                rows = self.data.groups(by).members(self.data, expanded)
+                return prepare_chart(self.data, x_attr, y_attr, radius_attr, color_attr, size_scale,
+                                     index=rows)
+        self.preparer.submit(
+            'chart', work,
+            lambda prepared: self.show_plot(prepared, by, expanded, x_attr, y_attr, color_attr, preview))
+
+    def show_plot(self, prepared, by, expanded, x_attr, y_attr, color_attr, preview=False):
+        labels = prepared.pop('labels', None)
+        if expanded is None:
+            title = f'{by}: mean {x_attr} vs mean {y_attr}'
+        else:
+            name = self.data.categories(by)[expanded]
+            title = f'{by} {name}: {x_attr} vs {y_attr} ({len(prepared["x"])} rows)'
+        self.chart.render(**prepared, x_label=x_attr, y_label=y_attr, color_label=color_attr,
+                          title=title, preview=preview)
+        if preview:
+            return
+        self.show_group_labels(prepared, labels)
+        self.canvas.draw()
+
+    def show_group_labels(self, prepared, labels):
+        for text in self.group_labels:
+            text.remove()
+        self.group_labels = [
+            self.ax.annotate(label, (x, y), xytext=(0, 0), textcoords='offset points',
+                             ha='center', va='center', fontsize=9, weight='bold')
+            for label, x, y in zip(labels or [], prepared['x'], prepared['y'])
+        ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Region overview bubble chart with drill-down')
+    parser.add_argument('-i', '--input', type=str, required=True, help='Path to the input CSV file')
+    parser.add_argument('--lod-threshold', type=int, default=200_000,
+                        help='Draw a density image instead of bubbles above this many visible points')
+    parser.add_argument('--trace', type=str, default=None,
+                        help='Record render stage timings and write them as a Chrome trace to this file on exit')
+    parser.add_argument('--follow', action='store_true',
+                        help='Keep watching the input and add rows appended to it')
+    parser.add_argument('--follow-ms', type=int, default=1000,
+                        help='How often to check a followed input for new rows, in milliseconds')
+    parser.add_argument('--frame-times', action='store_true', help='Show the latest stage timings over the chart')
+    args = parser.parse_args()
+    if args.trace or args.frame_times:
+        tracing.enable(args.trace)
+
+    app = QtWidgets.QApplication(sys.argv)
+
+    window = RegionBubbleApp(args.input, lod_threshold=args.lod_threshold, frame_times=args.frame_times,
+                             follow=args.follow, follow_ms=args.follow_ms)
+    window.show()
+
+    sys.exit(app.exec())
@@ -0,0 +1,237 @@
+import sys
+import numpy as np
+import argparse
+from matplotlib.backends.backend_qtagg import FigureCanvas
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
+from PyQt6 import QtWidgets
+from PyQt6.QtWidgets import QVBoxLayout, QWidget
+from dataset import ColumnStore
+from selection import RectIndex, SelectionModel
+from overlay import BlitOverlay
+from connections import ConnectionRegistry
+from scheduler import RenderScheduler
+
+
+class ScatterMatrix:
+    """Scatterplot matrix of many columns, drawn as rasters on a single axes.
+
+    Creating one matplotlib Axes per cell does not scale to 30x30 cells, so
+    every cell is a `bins` x `bins` block of one density image instead: a
+    row lands in the bin given by its min/max-normalized values. Each pair
+    of columns is binned once (its mirror cell is the transpose), which is
+    one np.bincount per pair over precomputed bin codes.
+
+    The gray density image, grid and labels are drawn once and cached by a
+    BlitOverlay. The selection is a second, animated image recomputed from
+    the selected rows only and blitted on top, together with the brush
+    rectangle, whenever the shared SelectionModel changes. Dragging in any
+    off-diagonal cell brushes that pair of columns.
+    """
+
+    base_color = (0.3, 0.3, 0.3)
+    highlight_color = (0.9, 0.3, 0.1)
+
+    def __init__(self, figure, store, columns, selection, bins=None):
+        self.figure = figure
+        self.store = store
+        self.columns = list(columns)
+        self.selection = selection
+        m = len(self.columns)
+        self.bins = bins or int(np.clip(768 // max(m, 1), 8, 64))
+
+        self.norm = {}
+        codes = []
+        for name in self.columns:
+            values = store.values(name)
+            finite = values[np.isfinite(values)]
+            lo, hi = (finite.min(), finite.max()) if len(finite) else (0.0, 1.0)
+            norm = (values - lo) / (hi - lo if hi > lo else 1.0)
+            self.norm[name] = norm
+            code = np.clip(np.floor(norm * self.bins), 0, self.bins - 1)
+            codes.append(np.where(np.isfinite(norm), code, -self.bins * self.bins).astype(np.int64))
+        self.codes = np.stack(codes) if codes else np.empty((0, len(store)), dtype=np.int64)
+        self._orders = {}
+        self._indexes = {}
+
+        self.ax = figure.add_axes((0.01, 0.01, 0.98, 0.98))
+        self.ax.set_axis_off()
+        self.ax.set_xlim(0, m)
+        self.ax.set_ylim(0, m)
+        extent = (0, m, 0, m)
+        self.base = self.ax.imshow(self._rgba(self._counts(), self.base_color), extent=extent,
+                                   origin='upper', interpolation='nearest', aspect='auto')
+        self.highlight = self.ax.imshow(np.zeros((m * self.bins, m * self.bins, 4)), extent=extent,
+                                        origin='upper', interpolation='nearest', aspect='auto')
+        edges = np.arange(m + 1)
+        lines = [((e, 0), (e, m)) for e in edges] + [((0, e), (m, e)) for e in edges]
+        self.ax.add_collection(LineCollection(lines, colors='black', linewidths=0.5))
+        fontsize = max(4, min(10, 300 / max(m, 1)))
+        for j, name in enumerate(self.columns):
+            self.ax.text(j + 0.5, m - j - 0.5, name, ha='center', va='center',
+                         fontsize=fontsize, wrap=True)
+        self.rect = Rectangle((0, 0), 0, 0, facecolor='red', edgecolor='black', alpha=0.3)
+        self.ax.add_patch(self.rect)
+        self.rect.set_visible(False)
+
+        self.overlay = BlitOverlay(figure.canvas)
+        self.overlay.add(self.highlight)
+        self.overlay.add(self.rect)
+        self.connections = ConnectionRegistry()
+        self.connections.add('overlay', self.overlay.disconnect)
+        canvas = figure.canvas
+        self.connections.connect('press', canvas, 'button_press_event', self._press)
+        self.connections.connect('motion', canvas, 'motion_notify_event', self._motion)
+        self.connections.connect('release', canvas, 'button_release_event', self._release)
+        self.connections.add('selection', selection.subscribe(self.show_selection))
+        self.scheduler = RenderScheduler(self._apply_brush)
+        self._drag = None
+        self.show_selection(selection.mask)
+
+    def close(self):
+        self.connections.release_all()
+
+    def show_selection(self, mask):
+        if mask is None:
+            self.highlight.set_data(np.zeros(self.highlight.get_array().shape))
+        else:
+            rows = np.flatnonzero(mask[:self.codes.shape[1]])
+            self.highlight.set_data(self._rgba(self._counts(rows), self.highlight_color))
+        self.overlay.update()
+
+    def _counts(self, rows=None):
+        m, b = len(self.columns), self.bins
+        codes = self.codes if rows is None else self.codes[:, rows]
+        counts = np.zeros((m * b, m * b), dtype=np.int64)
+        for i in range(m):
+            for j in range(i + 1, m):
+                flat = codes[j] * b + codes[i]
+                flat = flat[flat >= 0]
+                hist = np.bincount(flat, minlength=b * b).reshape(b, b)
+                counts[i * b:(i + 1) * b, j * b:(j + 1) * b] = hist.T[::-1]
+                counts[j * b:(j + 1) * b, i * b:(i + 1) * b] = hist[::-1]
+        return counts
+
+    def _rgba(self, counts, color):
+        rgba = np.zeros(counts.shape + (4,))
+        rgba[..., :3] = color
+        top = counts.max()
+        if top:
+            alpha = 0.35 + 0.65 * np.log1p(counts) / np.log1p(top)
+            rgba[..., 3] = np.where(counts > 0, alpha, 0.0)
+        return rgba
+
+    def _cell(self, xdata, ydata):
+        m = len(self.columns)
+        j, k = int(np.floor(xdata)), int(np.floor(ydata))
+        if not (0 <= j < m and 0 <= k < m):
+            return None
+        return m - 1 - k, j
+
+    def _index(self, i, j):
+        index = self._indexes.get((i, j))
+        if index is None:
+            x_name, y_name = self.columns[j], self.columns[i]
+            order = self._orders.get(j)
+            index = RectIndex(self.norm[x_name], self.norm[y_name], order=order)
+            self._orders[j] = index.order
+            self._indexes[(i, j)] = index
+        return index
+
+    def _press(self, event):
+        toolbar = self.figure.canvas.toolbar
+        if event.inaxes is not self.ax or event.button != 1 or (toolbar is not None and toolbar.mode):
+            return
+        cell = self._cell(event.xdata, event.ydata)
+        if cell is None or cell[0] == cell[1]:
+            return
+        self._drag = (cell, event.xdata, event.ydata, event.xdata, event.ydata)
+        self.rect.set_visible(True)
+        self._update_rect()
+
+    def _motion(self, event):
+        if self._drag is None or event.inaxes is not self.ax:
+            return
+        cell, x0, y0, _, _ = self._drag
+        self._drag = (cell, x0, y0, event.xdata, event.ydata)
+        self._update_rect()
+        self.scheduler.request()
+
+    def _release(self, event):
+        if self._drag is None:
+            return
+        self.scheduler.flush()
+        self._drag = None
+
+    def _update_rect(self):
+        (i, j), x0, y0, x1, y1 = self._drag
+        m = len(self.columns)
+        bottom = m - 1 - i
+        x0, x1 = np.clip((x0, x1), j, j + 1)
+        y0, y1 = np.clip((y0, y1), bottom, bottom + 1)
+        self.rect.set_bounds(min(x0, x1), min(y0, y1), abs(x1 - x0), abs(y1 - y0))
+        self.overlay.update()
+
+    def _apply_brush(self, preview=False):
+        if self._drag is None:
+            return
+        (i, j), _, _, _, _ = self._drag
+        x0, y0 = self.rect.get_xy()
+        width, height = self.rect.get_width(), self.rect.get_height()
+        if width == 0 or height == 0:
+            self.selection.set('splom', None)
+            return
+        u0, v0 = x0 - j, y0 - (len(self.columns) - 1 - i)
+        mask = self._index(i, j).query(u0, v0, u0 + width, v0 + height)
+        if len(mask) < self.selection.n_rows:
+            # Rows appended since the matrix was binned are not in it.
+            mask = np.concatenate((mask, np.zeros(self.selection.n_rows - len(mask), dtype=bool)))
+        self.selection.set('splom', mask)
+
+
+class ScatterMatrixWindow(QtWidgets.QMainWindow):
+    def __init__(self, store, selection=None, columns=None):
+        super().__init__()
+        self.setWindowTitle('Scatterplot Matrix')
+        self.data = store
+        self.selection = selection or SelectionModel(len(store))
+        self.main_widget = QWidget(self)
+        self.setCentralWidget(self.main_widget)
+        self.layout = QVBoxLayout(self.main_widget)
+
+        self.canvas = FigureCanvas(Figure(figsize=(9, 9)))
+        self.layout.addWidget(self.canvas)
+        self.columns = columns
+        self.matrix = None
+
+    def showEvent(self, event):
+        # Closing releases the matrix's selection subscription and mouse
+        # handlers, so a window shown again bins the (possibly grown)
+        # store into a fresh matrix.
+        if self.matrix is None:
+            self.canvas.figure.clear()
+            self.matrix = ScatterMatrix(self.canvas.figure, self.data,
+                                        self.columns or self.data.numeric_columns(), self.selection)
+            self.canvas.draw_idle()
+        super().showEvent(event)
+
+    def closeEvent(self, event):
+        if self.matrix is not None:
+            self.matrix.close()
+            self.matrix = None
+        super().closeEvent(event)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Scatterplot Matrix with Linked Brushing')
+    parser.add_argument('-i', '--input', type=str, required=True, help='Path to the input CSV file')
+    parser.add_argument('-c', '--columns', type=str, default=None,
+                        help='Comma-separated columns to include (default: every numeric column)')
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication(sys.argv)
+    columns = args.columns.split(',') if args.columns else None
+    window = ScatterMatrixWindow(ColumnStore.from_csv(args.input), columns=columns)
+    window.show()
+    sys.exit(app.exec())
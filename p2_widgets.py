@@ -1,28 +1,39 @@
 import sys
-import pandas as pd
-import numpy as np
 import argparse
-from matplotlib.backends.backend_qtagg import FigureCanvas
 from matplotlib.backends.backend_qtagg import NavigationToolbar2QT as NavigationToolbar
-from matplotlib.figure import Figure
 from PyQt6 import QtCore, QtWidgets
-from PyQt6.QtWidgets import QComboBox, QSlider, QLabel, QVBoxLayout, QHBoxLayout, QWidget
+from PyQt6.QtWidgets import QComboBox, QSlider, QLabel, QVBoxLayout, QHBoxLayout, QWidget, QProgressBar
+from dataset import ColumnStore
+from qtchart import RENDERERS, create_chart
+from scheduler import RenderScheduler
+from loader import CsvLoader
+import tracing
+from prepare import SCALE_MODES, Preparer, prepare_chart
+from selection import SelectionModel
+from sharing import SelectionBus
 
-import numpy as np
 
 class BubbleChartApp(QtWidgets.QMainWindow):
-    def __init__(self, dataset):
+    def __init__(self, dataset, lod_threshold=200_000, frame_times=False, follow=False, follow_ms=1000,
+                 share=False, renderer='matplotlib'):
         super().__init__()
 
-        self.dataset = pd.read_csv(dataset)
-        self.attributes = self.dataset.columns.tolist()
+        self.data = ColumnStore()
+        self.attributes = []
+        self.selection = SelectionModel(0)
+        self.selection.subscribe(self.apply_selection)
+        self.bus = SelectionBus(self.selection, dataset, parent=self) if share else None
         self.main_widget = QWidget(self)
         self.setCentralWidget(self.main_widget)
         self.layout = QVBoxLayout(self.main_widget)
 
-        self.canvas = FigureCanvas(Figure(figsize=(6, 6)))
-        self.ax = self.canvas.figure.subplots()
-        self.layout.addWidget(NavigationToolbar(self.canvas, self))
+        self.canvas, self.chart = create_chart(renderer, legend_color='white', lod_threshold=lod_threshold)
+        tracing.instrument_canvas(self.canvas)
+        if frame_times:
+            tracing.frame_time_label(self.canvas)
+        if renderer == 'matplotlib':
+            self.ax = self.chart.ax
+            self.layout.addWidget(NavigationToolbar(self.canvas, self))
         self.layout.addWidget(self.canvas)
 
         self.x_dropdown = QComboBox(self)
@@ -30,17 +41,16 @@ class BubbleChartApp(QtWidgets.QMainWindow):
         self.radius_dropdown = QComboBox(self)
         self.color_dropdown = QComboBox(self)
 
-        for attr in self.attributes:
-            self.x_dropdown.addItem(attr)
-            self.y_dropdown.addItem(attr)
-            self.radius_dropdown.addItem(attr)
-            self.color_dropdown.addItem(attr)
-
         self.size_slider = QSlider(QtCore.Qt.Orientation.Horizontal)
         self.size_slider.setMinimum(1)
         self.size_slider.setMaximum(100)
         self.size_slider.setValue(10)
 
+        self.size_mode = QComboBox(self)
+        self.size_mode.addItems(SCALE_MODES)
+        self.color_mode = QComboBox(self)
+        self.color_mode.addItems(SCALE_MODES)
+
         controls_layout = QHBoxLayout()
         controls_layout.addWidget(QLabel('X:'))
         controls_layout.addWidget(self.x_dropdown)
@@ -52,18 +62,58 @@ class BubbleChartApp(QtWidgets.QMainWindow):
         controls_layout.addWidget(self.color_dropdown)
         controls_layout.addWidget(QLabel('Bubble Size Scale:'))
         controls_layout.addWidget(self.size_slider)
+        controls_layout.addWidget(QLabel('Size scaling:'))
+        controls_layout.addWidget(self.size_mode)
+        controls_layout.addWidget(QLabel('Color scaling:'))
+        controls_layout.addWidget(self.color_mode)
 
         self.layout.addLayout(controls_layout)
 
-        self.x_dropdown.currentIndexChanged.connect(self.update_plot)
-        self.y_dropdown.currentIndexChanged.connect(self.update_plot)
-        self.radius_dropdown.currentIndexChanged.connect(self.update_plot)
-        self.color_dropdown.currentIndexChanged.connect(self.update_plot)
-        self.size_slider.valueChanged.connect(self.update_plot)
-        
-        self.update_plot()
-
-    def update_plot(self):
+        self.preparer = Preparer(parent=self)
+        self.scheduler = RenderScheduler(self.update_plot, interacting=self.size_slider.isSliderDown, parent=self)
+        self.x_dropdown.currentIndexChanged.connect(self.scheduler.request)
+        self.y_dropdown.currentIndexChanged.connect(self.scheduler.request)
+        self.radius_dropdown.currentIndexChanged.connect(self.scheduler.request)
+        self.color_dropdown.currentIndexChanged.connect(self.scheduler.request)
+        self.size_slider.valueChanged.connect(self.scheduler.request)
+        self.size_mode.currentIndexChanged.connect(self.scheduler.request)
+        self.color_mode.currentIndexChanged.connect(self.scheduler.request)
+
+        self.progress = QProgressBar()
+        self.statusBar().addPermanentWidget(self.progress)
+        self.loader = CsvLoader(dataset, self.data, follow=follow, follow_ms=follow_ms, parent=self)
+        self.loader.progress.connect(self.progress.setValue)
+        self.loader.updated.connect(self.data_updated)
+        self.loader.finished.connect(self.progress.hide)
+        self.loader.failed.connect(self.statusBar().showMessage)
+        self.preparer.failed.connect(self.statusBar().showMessage)
+        self.loader.start()
+
+    def closeEvent(self, event):
+        self.loader.cancel()
+        self.preparer.shutdown()
+        if self.bus is not None:
+            self.bus.close()
+        super().closeEvent(event)
+
+    def data_updated(self):
+        if not self.attributes:
+            self.attributes = self.data.columns
+            for attr in self.attributes:
+                self.x_dropdown.addItem(attr)
+                self.y_dropdown.addItem(attr)
+                self.radius_dropdown.addItem(attr)
+                self.color_dropdown.addItem(attr)
+        self.selection.resize(len(self.data))
+        if self.bus is not None:
+            self.bus.reapply()
+        self.scheduler.flush()
+
+    def apply_selection(self, mask):
+        self.chart.set_selection(mask)
+        self.canvas.draw_idle()
+
+    def update_plot(self, preview=False):
         x_attr = self.x_dropdown.currentText()
         y_attr = self.y_dropdown.currentText()
         radius_attr = self.radius_dropdown.currentText()
@@ -74,51 +124,49 @@ class BubbleChartApp(QtWidgets.QMainWindow):
             return
 
         size_scale = self.size_slider.value()
-
-        self.canvas.figure.clf()
-        self.ax = self.canvas.figure.add_subplot(111)
-
-        x = pd.to_numeric(self.dataset[x_attr], errors='coerce')
-        y = pd.to_numeric(self.dataset[y_attr], errors='coerce')
-        radius = pd.to_numeric(self.dataset[radius_attr], errors='coerce')
-        color = pd.to_numeric(self.dataset[color_attr], errors='coerce')
-
-        x = x.fillna(0)
-        y = y.fillna(0)
-        radius = radius.fillna(1)
-        color = color.fillna(0)
-
-        scaled_radius = radius * size_scale / radius.max()
-
-        scatter = self.ax.scatter(x, y, s=scaled_radius, c=color, alpha=0.6, cmap='viridis')
-        self.ax.set_xlabel(x_attr)
-        self.ax.set_ylabel(y_attr)
-        self.ax.set_title(f'Bubble Chart: {x_attr} vs {y_attr}')
-
-        self.colorbar = self.canvas.figure.colorbar(scatter, ax=self.ax, label=color_attr)
-
-        max_val = radius.max()
-        min_val = radius.min()
-        legend_sizes = np.linspace(min_val, max_val, 3)  
-        legend_bubbles = legend_sizes * size_scale / max_val
-
-        for size, scaled_size in zip(legend_sizes, legend_bubbles):
-            self.ax.scatter([], [], s=scaled_size, c='white', alpha=0.6, label=f'{size:.1f}')
-
-        self.ax.legend(scatterpoints=1, frameon=True, labelspacing=1, title="Bubble Size", loc="upper right")
-
-        self.canvas.figure.tight_layout()
-        self.canvas.draw()
+        size_mode, color_mode = self.size_mode.currentText(), self.color_mode.currentText()
+        rows = self.selection.n_rows
+        self.preparer.submit(
+            'chart',
+            lambda: prepare_chart(self.data, x_attr, y_attr, radius_attr, color_attr, size_scale, rows,
+                                  size_mode, color_mode),
+            lambda prepared: self.show_plot(prepared, x_attr, y_attr, color_attr, preview))
+
+    def show_plot(self, prepared, x_attr, y_attr, color_attr, preview=False):
+        if len(prepared['x']) != self.selection.n_rows:
+            return
+        self.chart.render(**prepared, x_label=x_attr, y_label=y_attr, color_label=color_attr,
+                          title=f'Bubble Chart: {x_attr} vs {y_attr}', selected=self.selection.mask,
+                          preview=preview)
+        if not preview:
+            self.canvas.draw()
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Interactive Bubble Chart with PyQt6')
     parser.add_argument('-i', '--input', type=str, required=True, help='Path to the input CSV file')
+    parser.add_argument('--lod-threshold', type=int, default=200_000,
+                        help='Draw a density image instead of bubbles above this many visible points')
+    parser.add_argument('--trace', type=str, default=None,
+                        help='Record render stage timings and write them as a Chrome trace to this file on exit')
+    parser.add_argument('--follow', action='store_true',
+                        help='Keep watching the input and add rows appended to it')
+    parser.add_argument('--follow-ms', type=int, default=1000,
+                        help='How often to check a followed input for new rows, in milliseconds')
+    parser.add_argument('--share', action='store_true',
+                        help='Show selections brushed in other windows on the same file')
+    parser.add_argument('--renderer', choices=RENDERERS, default='matplotlib',
+                        help='Draw the chart with matplotlib or natively with QPainter')
+    parser.add_argument('--frame-times', action='store_true', help='Show the latest stage timings over the chart')
     args = parser.parse_args()
+    if args.trace or args.frame_times:
+        tracing.enable(args.trace)
 
     app = QtWidgets.QApplication(sys.argv)
 
-    window = BubbleChartApp(args.input)
+    window = BubbleChartApp(args.input, lod_threshold=args.lod_threshold, frame_times=args.frame_times,
+                            follow=args.follow, follow_ms=args.follow_ms, share=args.share,
+                            renderer=args.renderer)
     window.show()
 
     sys.exit(app.exec())
@@ -0,0 +1,167 @@
+import numpy as np
+from PyQt6 import QtCore
+
+from tracing import traced
+
+
+SCALE_MODES = ('linear', 'log', 'quantile')
+
+
+def size_scale_for(stats, mode='linear', fill=1):
+    """(scale, legend values) for bubble sizes from a column's ColumnStats.
+
+    `scale(values)` maps the column onto size factors of at most 1:
+    proportional to the value ('linear'), to its log above the smallest
+    positive value ('log'), or proportional after clipping to the 1st-99th
+    percentile ('quantile'), so one outlier cannot shrink every other
+    bubble. The three legend values span the same range.
+    """
+    lo, hi = stats.range(fill)
+    if mode == 'log' and hi > 0:
+        base = min(stats.min_positive, hi)
+        top = np.log10(hi / base) + 1
+        return (lambda v: (np.log10(np.maximum(v, base) / base) + 1) / top), np.geomspace(base, hi, 3)
+    if mode == 'quantile':
+        q_lo, q_hi = stats.quantile(0.01), stats.quantile(0.99)
+        if q_hi > 0:
+            return (lambda v: np.clip(v, q_lo, q_hi) / q_hi), np.array([q_lo, stats.quantile(0.5), q_hi])
+    hi = hi or 1.0
+    return (lambda v: v / hi), np.linspace(lo, hi, 3)
+
+
+def color_limits_for(stats, mode='linear', fill=0):
+    """(vmin, vmax, log) color limits from a column's ColumnStats: the full
+    range, the 1st-99th percentile ('quantile') or the positive range on a
+    log scale ('log', when the column has positive values)."""
+    lo, hi = stats.range(fill)
+    if mode == 'log' and hi > 0:
+        return min(stats.min_positive, hi), hi, True
+    if mode == 'quantile':
+        q_lo, q_hi = stats.quantile(0.01), stats.quantile(0.99)
+        if np.isfinite(q_lo) and np.isfinite(q_hi):
+            return q_lo, q_hi, False
+    return lo, hi, False
+
+
+@traced('prepare_chart', 'prepare')
+def prepare_chart(store, x_attr, y_attr, size_attr, color_attr, size_scale, rows=None,
+                  size_mode='linear', color_mode='linear', index=None):
+    """Render-ready arrays for BubbleChart.render from the first `rows` rows.
+
+    Pure NumPy work with no Qt or matplotlib calls, so it can run on a
+    worker thread. Columns come from the store's cache and are returned
+    as-is when they already have `rows` rows, so unchanged columns keep
+    their identity between renders. Ranges, quantiles and legend values
+    come from the store's column statistics instead of scanning the data.
+    With `index`, only those rows are prepared, in that order.
+    """
+    def column(name, fill):
+        arr = store.filled(name, fill)
+        if index is not None:
+            return arr[index]
+        return arr if rows is None or len(arr) == rows else arr[:rows]
+
+    x = column(x_attr, 0)
+    y = column(y_attr, 0)
+    radius = column(size_attr, 1)
+    colors = column(color_attr, 0)
+
+    scale, legend_sizes = size_scale_for(store.stats(size_attr), size_mode, fill=1)
+    vmin, vmax, log = color_limits_for(store.stats(color_attr), color_mode, fill=0)
+    if log:
+        colors = np.maximum(colors, vmin)
+    return {
+        'x': x,
+        'y': y,
+        'sizes': scale(radius) * size_scale,
+        'colors': colors,
+        'legend_sizes': legend_sizes,
+        'legend_bubbles': scale(legend_sizes) * size_scale,
+        'color_limits': (vmin, vmax),
+        'color_log': log,
+        'rows': index,
+    }
+
+
+class _JobSignals(QtCore.QObject):
+    finished = QtCore.pyqtSignal(object)
+
+
+class _Job(QtCore.QRunnable):
+    def __init__(self, key, generation, work, signals):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.key = key
+        self.generation = generation
+        self.work = work
+        self.signals = signals
+        self.result = None
+        self.error = None
+
+    def run(self):
+        try:
+            self.result = self.work()
+        except Exception as exc:
+            self.error = f'{type(exc).__name__}: {exc}'
+        self.signals.finished.emit(self)
+
+
+class Preparer(QtCore.QObject):
+    """Runs data preparation on a thread pool, one current job per key.
+
+    `submit(key, work, done)` runs `work()` on a pool thread and calls
+    `done(result)` back on the GUI thread. A newer submit for the same key
+    cancels the older job: it is taken off the queue if it has not started,
+    and its result is dropped if it has. So only the latest inputs of a
+    view ever reach its artists, however many jobs were queued meanwhile.
+    Failures are reported through `failed`.
+    """
+
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, max_threads=None, parent=None):
+        super().__init__(parent)
+        self.pool = QtCore.QThreadPool(self)
+        if max_threads:
+            self.pool.setMaxThreadCount(max_threads)
+        self._signals = _JobSignals(self)
+        self._signals.finished.connect(self._deliver)
+        self._generation = 0
+        self._current = {}
+        self._jobs = set()
+
+    def submit(self, key, work, done):
+        self.cancel(key)
+        self._generation += 1
+        job = _Job(key, self._generation, work, self._signals)
+        self._jobs.add(job)
+        self._current[key] = (job, done)
+        self.pool.start(job)
+
+    def cancel(self, key=None):
+        """Cancel the job for `key`, or every job when `key` is None."""
+        keys = list(self._current) if key is None else [key]
+        for k in keys:
+            current = self._current.pop(k, None)
+            if current is not None and self.pool.tryTake(current[0]):
+                self._jobs.discard(current[0])
+
+    def pending(self):
+        return bool(self._current)
+
+    def shutdown(self):
+        """Cancel everything and wait for running jobs to finish."""
+        self.cancel()
+        self.pool.waitForDone()
+
+    @QtCore.pyqtSlot(object)
+    def _deliver(self, job):
+        self._jobs.discard(job)
+        current = self._current.get(job.key)
+        if current is None or current[0] is not job:
+            return
+        del self._current[job.key]
+        if job.error is not None:
+            self.failed.emit(job.error)
+        else:
+            current[1](job.result)
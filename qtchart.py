@@ -0,0 +1,674 @@
+import numpy as np
+from matplotlib.backends.backend_qtagg import FigureCanvas
+from matplotlib.colors import LogNorm, Normalize
+from matplotlib.figure import Figure
+from matplotlib.ticker import LogLocator, MaxNLocator
+from PyQt6 import QtCore, QtGui, QtWidgets, sip
+
+from chart import BubbleChart, bubble_cmap
+from hittest import HitTester
+from lod import bin_points
+from selection import Brush
+from tracing import span, traced
+
+RENDERERS = ('matplotlib', 'qpainter')
+
+
+def create_chart(renderer='matplotlib', legend_color='white', lod_threshold=None):
+    """(widget, chart) drawing bubble charts with `renderer`.
+
+    For 'matplotlib' these are a FigureCanvas and the BubbleChart on its
+    figure; for 'qpainter' one NativeBubbleChart is both. Either way the
+    chart takes the same `render` and `set_selection` calls, has the same
+    `hits`, and the widget the same `draw` and `draw_idle`.
+    """
+    if renderer == 'matplotlib':
+        canvas = FigureCanvas(Figure(figsize=(6, 6)))
+        return canvas, BubbleChart(canvas.figure, legend_color=legend_color, lod_threshold=lod_threshold)
+    if renderer == 'qpainter':
+        chart = NativeBubbleChart(legend_color=legend_color, lod_threshold=lod_threshold)
+        return chart, chart
+    raise ValueError(f'unknown renderer {renderer!r}, expected one of {RENDERERS}')
+
+
+class _SpriteAtlas:
+    """Antialiased disks of every color of a lookup table, in one pixmap.
+
+    Each level holds the disks at one diameter (`levels`, in pixels): every
+    whole pixel up to 32, then coarser steps. A level is a shelf of rows
+    `width` pixels wide, below the previous level. A bubble is drawn from
+    the level nearest its diameter, scaled by little enough that sampling
+    the sprite without smoothing keeps its antialiased edge.
+    """
+
+    levels = np.concatenate((np.arange(1, 33), [40, 48, 56, 64]))
+    width = 1024
+
+    def __init__(self, colors):
+        self.columns = self.width // self.levels
+        heights = -(-len(colors) // self.columns) * self.levels
+        self.tops = np.concatenate(([0], np.cumsum(heights[:-1])))
+        self.pixmap = QtGui.QPixmap(self.width, int(heights.sum()))
+        self.pixmap.fill(QtCore.Qt.GlobalColor.transparent)
+        painter = QtGui.QPainter(self.pixmap)
+        painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
+        painter.setPen(QtCore.Qt.PenStyle.NoPen)
+        index = np.arange(len(colors))
+        for level, size in enumerate(self.levels):
+            lefts, tops = self.sources(index, level)
+            for (r, g, b, a), left, top in zip(colors, lefts, tops):
+                painter.setBrush(QtGui.QColor.fromRgbF(r, g, b, a))
+                painter.drawEllipse(QtCore.QRectF(left, top, size, size))
+        painter.end()
+
+    def level_of(self, diameters):
+        return np.minimum(np.searchsorted(self.levels, diameters - 0.5), len(self.levels) - 1)
+
+    def sources(self, index, level):
+        """Top-left corners of the sprites of colors `index` at `level`."""
+        size, columns = self.levels[level], self.columns[level]
+        return (index % columns) * size, self.tops[level] + (index // columns) * size
+
+
+class _ViewHitTester(HitTester):
+    """HitTester in the widget coordinates of a NativeBubbleChart."""
+
+    def __init__(self, view, pickradius=5.0):
+        super().__init__(None, pickradius)
+        self.view = view
+
+    def _view_key(self):
+        return self.view.view_limits(), self.view.width(), self.view.height()
+
+    def _to_display(self, xy):
+        return np.column_stack(self.view.to_widget(xy[:, 0], xy[:, 1]))
+
+    def _display_bounds(self):
+        rect = self.view.plot_rect()
+        return rect.left(), rect.top(), rect.width(), rect.height()
+
+    def _pixels_per_point(self):
+        return self.view.dpi / 72
+
+
+class _Tooltip:
+    """The hover text box of a NativeBubbleChart, with the part of the
+    matplotlib Text interface the apps use on their hover text."""
+
+    def __init__(self, view):
+        self.view = view
+        self._text = ''
+        self._visible = False
+
+    def set_text(self, text):
+        self._text = text
+
+    def get_text(self):
+        return self._text
+
+    def set_visible(self, visible):
+        self._visible = visible
+
+    def get_visible(self):
+        return self._visible
+
+    def paint(self, painter, rect):
+        if not (self._visible and self._text):
+            return
+        painter.setFont(QtGui.QFont(painter.font().family(), 10))
+        text = painter.fontMetrics().boundingRect(QtCore.QRect(0, 0, 2000, 2000),
+                                                  QtCore.Qt.AlignmentFlag.AlignLeft, self._text)
+        box = QtCore.QRectF(0, 0, text.width() + 12, text.height() + 8)
+        box.moveTopRight(QtCore.QPointF(rect.right() - 0.05 * rect.width(), rect.top() + 0.05 * rect.height()))
+        painter.setPen(QtGui.QColor('black'))
+        painter.setBrush(QtGui.QColor(255, 255, 255, 204))
+        painter.drawRoundedRect(box, 4, 4)
+        painter.drawText(box.adjusted(6, 4, -6, -4), QtCore.Qt.AlignmentFlag.AlignLeft, self._text)
+
+
+class NativeBubbleChart(QtWidgets.QWidget):
+    """Bubble chart drawn directly with QPainter, standing in for both a
+    BubbleChart and its canvas.
+
+    Every bubble is a scaled sprite from an atlas of antialiased disks,
+    one per colormap entry plus the gray of unselected rows, and all of
+    them go to the paint engine in a single drawPixmapFragments call whose
+    fragment array is filled from numpy, in row order like the matplotlib
+    scatter. Axes, ticks, colorbar and legend come from the same arrays,
+    colormap, norms and tick locators as BubbleChart. The chart is painted
+    into a cached image, redrawn only when the points, selection, view or
+    widget size change; the hover tooltip and brush shapes are painted
+    over it, so those frames cost one image copy.
+
+    `render`, `set_selection`, `hits` (in widget coordinates), `draw` and
+    `draw_idle` behave as on BubbleChart and FigureCanvas, including the
+    preview renders and the density image above `lod_threshold` visible
+    points. `tooltip` and `update()` can stand in for the hover text
+    artist and its BlitOverlay.
+
+    The right button pans, the wheel zooms about the cursor and Home (or
+    h) restores the full view. With a brush `tool` set, the left button
+    draws a rectangle, lasso or polygon (closed on its first vertex or by
+    a double click; Escape drops it), and the finished shape goes out in
+    data coordinates through `rect_selected` or `shape_selected`.
+    `hovered` sends the row under the cursor, or None, while the cursor
+    is over the plot area, and None once it leaves it.
+    """
+
+    hovered = QtCore.pyqtSignal(object)
+    rect_selected = QtCore.pyqtSignal(float, float, float, float)
+    shape_selected = QtCore.pyqtSignal(object)
+
+    tools = ('rectangle', 'lasso', 'polygon')
+    # Sizes are points**2 as for ax.scatter, at matplotlib's default dpi;
+    # bubbles grow by the width of the face-colored edge scatter draws.
+    dpi = 100
+    linewidth = 1.0
+    preview_points = 50_000
+    # left, top, right, bottom of the plot area, in pixels
+    margins = (80, 40, 110, 56)
+    density_bin_px = 3
+    close_px = 8
+    # Shared by every chart: all of them use the same colormap.
+    _atlas = None
+
+    def __init__(self, legend_color='white', lod_threshold=None, parent=None):
+        super().__init__(parent)
+        self.legend_color = legend_color
+        self.lod_threshold = lod_threshold
+        self.tool = None
+        self.tooltip = _Tooltip(self)
+        self.hits = _ViewHitTester(self)
+        cmap = bubble_cmap()
+        self._lut = np.vstack((cmap(np.linspace(0, 1, cmap.N)), [cmap.get_bad()]))
+        if NativeBubbleChart._atlas is None:
+            NativeBubbleChart._atlas = _SpriteAtlas(self._lut)
+        self._points = None
+        self._xy = (None, None)
+        self._selected = None
+        self._sample = None
+        self._dense = False
+        self._norm = Normalize(0, 1)
+        self._labels = ('', '', '', '')
+        self._legend = ((), ())
+        self._home = None
+        self._limits = None
+        self._layer = None
+        self._shape = []
+        self._cursor = None
+        self._pan = None
+        self.setMinimumSize(300, 300)
+        self.setMouseTracking(True)
+        self.setFocusPolicy(QtCore.Qt.FocusPolicy.ClickFocus)
+
+    def sizeHint(self):
+        return QtCore.QSize(600, 600)
+
+    @traced('chart.render')
+    def render(self, x, y, sizes, colors, legend_sizes, legend_bubbles,
+               x_label, y_label, color_label, title, selected=None, preview=False,
+               color_limits=None, color_log=False, rows=None):
+        if preview and self._home is not None:
+            if self._dense:
+                return
+            with span('preview'):
+                if len(x) > self.preview_points and (self._sample is None or self._sample[0] != len(x)):
+                    rng = np.random.default_rng(0)
+                    self._sample = (len(x), np.sort(rng.choice(len(x), self.preview_points, replace=False)))
+                self._points = (x, y, np.broadcast_to(sizes, np.shape(x)), colors)
+                self._selected = selected
+                self._layer = None
+                self.repaint()
+            return
+        self._sample = None
+        moved = x is not self._xy[0] or y is not self._xy[1]
+        self._xy = (x, y)
+
+        with span('artists'):
+            self._points = (x, y, np.broadcast_to(sizes, np.shape(x)), colors)
+            self._selected = selected
+            norm = LogNorm() if color_log else Normalize()
+            if color_limits is not None:
+                norm.vmin, norm.vmax = color_limits
+            elif len(colors):
+                norm.vmin, norm.vmax = np.nanmin(colors), np.nanmax(colors)
+            self._norm = norm
+            self._legend = (tuple(legend_sizes), tuple(legend_bubbles))
+            self._labels = (x_label, y_label, color_label, title)
+            self._layer = None
+        with span('hit_index'):
+            self.hits.set_points(x, y, sizes, rows)
+
+        if moved or self._home is None:
+            with span('rescale'):
+                self._home = self._data_limits(x, y)
+                self._limits = self._home
+
+    def set_selection(self, selected):
+        """Gray out the rows outside `selected`; None colors every row.
+
+        As on BubbleChart, a mask for a different number of rows than the
+        last render is ignored.
+        """
+        if self._points is None or (selected is not None and len(selected) != len(self._points[0])):
+            return
+        self._selected = selected
+        self._layer = None
+
+    def set_tool(self, tool):
+        """Brush gesture of the left button: one of `tools`, or None."""
+        if tool is not None and tool not in self.tools:
+            raise ValueError(f'unknown brush tool {tool!r}, expected one of {self.tools}')
+        self.tool = tool
+        self.clear_shape()
+
+    def clear_shape(self):
+        self._shape = []
+        self.update()
+
+    def draw(self):
+        self.repaint()
+
+    def draw_idle(self):
+        self.update()
+
+    @traced('hover', 'event')
+    def hover_at(self, px, py):
+        """Send the row of the bubble at widget position (px, py) via `hovered`."""
+        self.hovered.emit(self.hits.query(px, py))
+
+    def plot_rect(self):
+        left, top, right, bottom = self.margins
+        return QtCore.QRectF(left, top, max(self.width() - left - right, 1), max(self.height() - top - bottom, 1))
+
+    def view_limits(self):
+        """(x0, x1, y0, y1) of the current view, or None before the first render."""
+        return self._limits
+
+    def set_view_limits(self, limits):
+        self._limits = tuple(limits)
+        self._layer = None
+        self.update()
+
+    def to_widget(self, x, y):
+        rect = self.plot_rect()
+        x0, x1, y0, y1 = self._limits
+        return (rect.left() + (np.asarray(x, dtype=float) - x0) * (rect.width() / (x1 - x0)),
+                rect.bottom() - (np.asarray(y, dtype=float) - y0) * (rect.height() / (y1 - y0)))
+
+    def to_data(self, px, py):
+        rect = self.plot_rect()
+        x0, x1, y0, y1 = self._limits
+        return (x0 + (px - rect.left()) * ((x1 - x0) / rect.width()),
+                y0 + (rect.bottom() - py) * ((y1 - y0) / rect.height()))
+
+    @staticmethod
+    def _data_limits(x, y):
+        # Autoscaling as matplotlib does it: finite data range plus 5%
+        # margins, widened around single values.
+        limits = []
+        for values in (x, y):
+            values = np.asarray(values, dtype=float)
+            finite = values[np.isfinite(values)]
+            lo, hi = (float(finite.min()), float(finite.max())) if len(finite) else (0.0, 1.0)
+            if lo == hi:
+                lo, hi = lo - max(abs(lo) * 0.05, 0.5), hi + max(abs(hi) * 0.05, 0.5)
+            pad = (hi - lo) * 0.05
+            limits += [lo - pad, hi + pad]
+        return tuple(limits)
+
+    # Painting
+
+    def paintEvent(self, event):
+        if self._layer is None:
+            self._layer = self._render_layer()
+        painter = QtGui.QPainter(self)
+        painter.drawImage(0, 0, self._layer)
+        painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
+        self._paint_shape(painter)
+        self.tooltip.paint(painter, self.plot_rect())
+        painter.end()
+
+    def resizeEvent(self, event):
+        self._layer = None
+        super().resizeEvent(event)
+
+    def _render_layer(self):
+        ratio = self.devicePixelRatioF()
+        layer = QtGui.QImage(max(int(self.width() * ratio), 1), max(int(self.height() * ratio), 1),
+                             QtGui.QImage.Format.Format_ARGB32_Premultiplied)
+        layer.setDevicePixelRatio(ratio)
+        layer.fill(QtGui.QColor('white'))
+        if self._points is None:
+            return layer
+        painter = QtGui.QPainter(layer)
+        painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
+        rect = self.plot_rect()
+        painter.save()
+        painter.setClipRect(rect)
+        with span('points'):
+            self._paint_points(painter, rect)
+        painter.restore()
+        self._paint_axes(painter, rect)
+        self._paint_colorbar(painter, rect)
+        self._paint_legend(painter, rect)
+        painter.end()
+        return layer
+
+    def _paint_points(self, painter, rect):
+        x, y, sizes, colors = self._points
+        selected = self._selected
+        x0, x1, y0, y1 = self._limits
+        if self._sample is None and self.lod_threshold is not None:
+            xa, ya = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+            in_view = np.count_nonzero((xa >= x0) & (xa <= x1) & (ya >= y0) & (ya <= y1))
+            self._dense = in_view > self.lod_threshold
+            if self._dense:
+                self._paint_density(painter, rect, xa, ya, colors, selected)
+                return
+        if self._sample is not None:
+            index = self._sample[1]
+            x, y, sizes, colors = x[index], y[index], sizes[index], colors[index]
+            if selected is not None:
+                selected = selected[index]
+
+        px, py = self.to_widget(x, y)
+        diameters = (np.sqrt(np.abs(np.asarray(sizes, dtype=float))) + self.linewidth) * (self.dpi / 72)
+        radius = diameters / 2
+        visible = ((px + radius >= rect.left()) & (px - radius <= rect.right())
+                   & (py + radius >= rect.top()) & (py - radius <= rect.bottom()))
+        sprites = self._color_index(colors)
+        if selected is not None:
+            sprites[~selected] = len(self._lut) - 1
+        keep = np.flatnonzero(visible)
+        if not len(keep):
+            return
+
+        # A PixmapFragment is ten qreals: x, y (target center), sourceLeft,
+        # sourceTop, width, height, scaleX, scaleY, rotation, opacity.
+        fragments = sip.array(QtGui.QPainter.PixmapFragment, len(keep))
+        fields = np.frombuffer(fragments, dtype=np.float64).reshape(len(keep), 10)
+        diameters = diameters[keep]
+        level = self._atlas.level_of(diameters)
+        side = self._atlas.levels[level]
+        fields[:, 0] = px[keep]
+        fields[:, 1] = py[keep]
+        fields[:, 2], fields[:, 3] = self._atlas.sources(sprites[keep], level)
+        fields[:, 4] = side
+        fields[:, 5] = side
+        fields[:, 6] = diameters / side
+        fields[:, 7] = fields[:, 6]
+        fields[:, 8] = 0
+        fields[:, 9] = 1
+        painter.drawPixmapFragments(fragments, self._atlas.pixmap)
+
+    def _color_index(self, values):
+        """Colormap entry of each value under the current norm; the last
+        entry (gray) for values the norm masks."""
+        n = len(self._lut) - 1
+        with np.errstate(invalid='ignore'):
+            scaled = np.ma.filled(np.ma.asarray(self._norm(values), dtype=float), np.nan)
+            index = np.clip(np.floor(scaled * n), 0, n - 1)
+        return np.where(np.isnan(scaled), n, index).astype(np.int64)
+
+    def _paint_density(self, painter, rect, x, y, colors, selected):
+        shape = (max(int(rect.width() // self.density_bin_px), 1), max(int(rect.height() // self.density_bin_px), 1))
+        counts, means = bin_points(x, y, colors, self._limits, shape)
+        index = self._color_index(means)
+        if selected is not None:
+            # As in lod.DensityImage: bins are colored by their selected
+            # points only, and bins without any are gray.
+            picked, picked_means = bin_points(x[selected], y[selected], colors[selected], self._limits, shape)
+            index = np.where(picked > 0, self._color_index(picked_means), len(self._lut) - 1)
+        rgba = (self._lut[index] * 255).astype(np.uint8)
+        rgba[counts == 0] = 0
+        rgba = np.ascontiguousarray(rgba[::-1])
+        image = QtGui.QImage(rgba.data, shape[0], shape[1], shape[0] * 4, QtGui.QImage.Format.Format_RGBA8888)
+        painter.drawImage(rect, image)
+
+    def _paint_axes(self, painter, rect):
+        x_label, y_label, color_label, title = self._labels
+        x0, x1, y0, y1 = self._limits
+        painter.setPen(QtGui.QColor('black'))
+        painter.setBrush(QtCore.Qt.BrushStyle.NoBrush)
+        painter.drawRect(rect)
+        metrics = painter.fontMetrics()
+        for value in self._ticks(x0, x1):
+            px = float(self.to_widget(value, y0)[0])
+            painter.drawLine(QtCore.QPointF(px, rect.bottom()), QtCore.QPointF(px, rect.bottom() + 4))
+            painter.drawText(QtCore.QRectF(px - 50, rect.bottom() + 6, 100, metrics.height()),
+                             QtCore.Qt.AlignmentFlag.AlignHCenter, _format_tick(value))
+        for value in self._ticks(y0, y1):
+            py = float(self.to_widget(x0, value)[1])
+            painter.drawLine(QtCore.QPointF(rect.left() - 4, py), QtCore.QPointF(rect.left(), py))
+            painter.drawText(QtCore.QRectF(rect.left() - 76, py - metrics.height() / 2, 70, metrics.height()),
+                             QtCore.Qt.AlignmentFlag.AlignRight, _format_tick(value))
+        painter.drawText(QtCore.QRectF(rect.left(), rect.bottom() + 8 + metrics.height(), rect.width(),
+                                       metrics.height()), QtCore.Qt.AlignmentFlag.AlignHCenter, x_label)
+        painter.drawText(QtCore.QRectF(rect.left(), rect.top() - 8 - metrics.height(), rect.width(),
+                                       metrics.height()), QtCore.Qt.AlignmentFlag.AlignHCenter, title)
+        _draw_vertical_text(painter, QtCore.QPointF(rect.left() - 68, rect.center().y()), y_label)
+
+    def _paint_colorbar(self, painter, rect):
+        bar = QtCore.QRectF(rect.right() + 16, rect.top(), 14, rect.height())
+        rgba = np.ascontiguousarray((self._lut[-2::-1] * 255).astype(np.uint8))
+        image = QtGui.QImage(rgba.data, 1, len(rgba), 4, QtGui.QImage.Format.Format_RGBA8888)
+        painter.drawImage(bar, image)
+        painter.setPen(QtGui.QColor('black'))
+        painter.setBrush(QtCore.Qt.BrushStyle.NoBrush)
+        painter.drawRect(bar)
+        vmin, vmax = self._norm.vmin, self._norm.vmax
+        if vmin is None or vmax is None:
+            return
+        metrics = painter.fontMetrics()
+        log = isinstance(self._norm, LogNorm)
+        label_x = bar.right() + 12
+        for value in self._ticks(vmin, vmax, log):
+            with np.errstate(invalid='ignore', divide='ignore'):
+                fraction = float(np.ma.filled(self._norm(value), np.nan))
+            if not 0 <= fraction <= 1:
+                continue
+            py = bar.bottom() - fraction * bar.height()
+            text = _format_tick(value)
+            painter.drawLine(QtCore.QPointF(bar.right(), py), QtCore.QPointF(bar.right() + 4, py))
+            painter.drawText(QtCore.QRectF(bar.right() + 6, py - metrics.height() / 2, 60, metrics.height()),
+                             QtCore.Qt.AlignmentFlag.AlignLeft, text)
+            label_x = max(label_x, bar.right() + 12 + metrics.horizontalAdvance(text))
+        _draw_vertical_text(painter, QtCore.QPointF(label_x + metrics.height() / 2, bar.center().y()),
+                            self._labels[2])
+
+    def _paint_legend(self, painter, rect):
+        legend_sizes, legend_bubbles = self._legend
+        if not legend_sizes:
+            return
+        metrics = painter.fontMetrics()
+        diameters = [np.sqrt(abs(s)) * self.dpi / 72 for s in legend_bubbles]
+        labels = [f'{size:.1f}' for size in legend_sizes]
+        row = max(max(diameters), metrics.height()) + metrics.height() * 0.5
+        title = 'Bubble Size'
+        width = max(metrics.horizontalAdvance(title),
+                    max(diameters) + 8 + max(metrics.horizontalAdvance(label) for label in labels)) + 16
+        box = QtCore.QRectF(0, 0, width, metrics.height() + 8 + row * len(labels))
+        box.moveTopRight(QtCore.QPointF(rect.right() - 8, rect.top() + 8))
+        painter.setPen(QtGui.QColor(204, 204, 204))
+        painter.setBrush(QtGui.QColor(255, 255, 255, 204))
+        painter.drawRoundedRect(box, 3, 3)
+        painter.setPen(QtGui.QColor('black'))
+        painter.drawText(QtCore.QRectF(box.left(), box.top() + 4, box.width(), metrics.height()),
+                         QtCore.Qt.AlignmentFlag.AlignHCenter, title)
+        fill = QtGui.QColor(self.legend_color)
+        fill.setAlphaF(0.6)
+        center_x = box.left() + 8 + max(diameters) / 2
+        for i, (diameter, label) in enumerate(zip(diameters, labels)):
+            center_y = box.top() + metrics.height() + 8 + row * (i + 0.5)
+            painter.setPen(QtCore.Qt.PenStyle.NoPen)
+            painter.setBrush(fill)
+            painter.drawEllipse(QtCore.QPointF(center_x, center_y), diameter / 2, diameter / 2)
+            painter.setPen(QtGui.QColor('black'))
+            painter.drawText(QtCore.QRectF(center_x + max(diameters) / 2 + 8, center_y - metrics.height() / 2,
+                                           width, metrics.height()), QtCore.Qt.AlignmentFlag.AlignLeft, label)
+
+    def _paint_shape(self, painter):
+        if not self._shape or self._limits is None:
+            return
+        points = [QtCore.QPointF(*map(float, self.to_widget(x, y))) for x, y in self._shape]
+        painter.setPen(QtGui.QPen(QtGui.QColor('black'), 1, QtCore.Qt.PenStyle.DashLine))
+        if self.tool == 'rectangle':
+            painter.setBrush(QtGui.QColor(255, 0, 0, 50))
+            painter.drawRect(QtCore.QRectF(points[0], points[-1]).normalized())
+        elif self.tool == 'polygon' and self._cursor is not None:
+            painter.drawPolyline(QtGui.QPolygonF(points + [self._cursor]))
+        else:
+            painter.drawPolyline(QtGui.QPolygonF(points))
+
+    @staticmethod
+    def _ticks(lo, hi, log=False):
+        lo, hi = sorted((float(lo), float(hi)))
+        if log and lo > 0:
+            values = LogLocator().tick_values(lo, hi)
+            if np.count_nonzero((values >= lo) & (values <= hi)) < 2:
+                values = LogLocator(subs=np.arange(1.0, 10.0)).tick_values(lo, hi)
+        else:
+            values = MaxNLocator(nbins=6, steps=[1, 2, 2.5, 5, 10]).tick_values(lo, hi)
+        eps = (hi - lo) * 1e-9
+        return [value for value in values if lo - eps <= value <= hi + eps]
+
+    # Interaction
+
+    def mousePressEvent(self, event):
+        pos = event.position()
+        if self._limits is None:
+            return
+        if event.button() == QtCore.Qt.MouseButton.RightButton:
+            self._pan = (pos, self._limits)
+            return
+        if event.button() != QtCore.Qt.MouseButton.LeftButton or self.tool is None \
+                or not self.plot_rect().contains(pos):
+            return
+        point = self.to_data(pos.x(), pos.y())
+        if self.tool != 'polygon':
+            self._shape = [point]
+        elif len(self._shape) >= 3 and self._near_first_vertex(pos):
+            self._finish_shape()
+            return
+        else:
+            self._shape.append(point)
+        self.update()
+
+    def mouseMoveEvent(self, event):
+        pos = event.position()
+        if self._pan is not None:
+            start, (x0, x1, y0, y1) = self._pan
+            rect = self.plot_rect()
+            dx = (start.x() - pos.x()) * (x1 - x0) / rect.width()
+            dy = (pos.y() - start.y()) * (y1 - y0) / rect.height()
+            self.set_view_limits((x0 + dx, x1 + dx, y0 + dy, y1 + dy))
+            return
+        if self._shape and event.buttons() & QtCore.Qt.MouseButton.LeftButton and self.tool != 'polygon':
+            point = self.to_data(pos.x(), pos.y())
+            if self.tool == 'rectangle':
+                self._shape = [self._shape[0], point]
+            else:
+                self._shape.append(point)
+            self.update()
+            return
+        if self.tool == 'polygon' and self._shape:
+            self._cursor = pos
+            self.update()
+        if self._limits is not None and self.plot_rect().contains(pos):
+            self.hover_at(pos.x(), pos.y())
+        else:
+            self.hovered.emit(None)
+
+    def leaveEvent(self, event):
+        self.hovered.emit(None)
+        super().leaveEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == QtCore.Qt.MouseButton.RightButton:
+            self._pan = None
+        elif event.button() == QtCore.Qt.MouseButton.LeftButton and self.tool in ('rectangle', 'lasso') \
+                and self._shape:
+            self._finish_shape()
+
+    def mouseDoubleClickEvent(self, event):
+        if self.tool == 'polygon' and len(self._shape) >= 3:
+            self._finish_shape()
+
+    def wheelEvent(self, event):
+        if self._limits is None:
+            return
+        pos = event.position()
+        cx, cy = self.to_data(pos.x(), pos.y())
+        factor = 0.85 ** (event.angleDelta().y() / 120)
+        x0, x1, y0, y1 = self._limits
+        self.set_view_limits((cx + (x0 - cx) * factor, cx + (x1 - cx) * factor,
+                              cy + (y0 - cy) * factor, cy + (y1 - cy) * factor))
+
+    def keyPressEvent(self, event):
+        if event.key() == QtCore.Qt.Key.Key_Escape:
+            self._cursor = None
+            self.clear_shape()
+        elif event.key() in (QtCore.Qt.Key.Key_Home, QtCore.Qt.Key.Key_H) and self._home is not None:
+            self.set_view_limits(self._home)
+        else:
+            super().keyPressEvent(event)
+
+    def _near_first_vertex(self, pos):
+        px, py = self.to_widget(*self._shape[0])
+        return (px - pos.x()) ** 2 + (py - pos.y()) ** 2 <= self.close_px ** 2
+
+    def _finish_shape(self):
+        vertices = np.array(self._shape, dtype=float)
+        self._cursor = None
+        if self.tool == 'rectangle':
+            (x1, y1), (x2, y2) = vertices[0], vertices[-1]
+            self.rect_selected.emit(x1, y1, x2, y2)
+        else:
+            if self.tool == 'lasso':
+                self._shape = []
+            self.shape_selected.emit(vertices)
+        self.update()
+
+
+class ViewBrush(Brush):
+    """Brush of a NativeBubbleChart: selection.Brush with the gestures
+    drawn by the view and delivered through its signals."""
+
+    tools = NativeBubbleChart.tools
+
+    def __init__(self, xs, ys, view, callback, tool='rectangle', mode='replace'):
+        self.view = view
+        super().__init__(xs, ys, None, callback, None, tool=tool, mode=mode)
+        view.rect_selected.connect(self.select_rect)
+        view.shape_selected.connect(self.onlasso)
+
+    def set_tool(self, tool):
+        self.view.set_tool(tool)
+        self.tool = tool
+
+    def disconnect(self):
+        self.view.rect_selected.disconnect(self.select_rect)
+        self.view.shape_selected.disconnect(self.onlasso)
+        self.view.set_tool(None)
+
+    def _clear_shape(self):
+        self.view.clear_shape()
+
+    def _redraw(self):
+        # The view repaints its shape itself, and the selection repaints
+        # the points.
+        pass
+
+
+def _format_tick(value):
+    return f'{value:g}'
+
+
+def _draw_vertical_text(painter, center, text):
+    """`text` rotated to read bottom to top, centered on `center`."""
+    painter.save()
+    painter.translate(center)
+    painter.rotate(-90)
+    painter.drawText(QtCore.QRectF(-200, -10, 400, 20), QtCore.Qt.AlignmentFlag.AlignCenter, text)
+    painter.restore()
@@ -0,0 +1,68 @@
+from PyQt6 import QtCore
+
+from tracing import span
+
+
+class RenderScheduler(QtCore.QObject):
+    """Coalesces bursts of control events into one render per event-loop turn.
+
+    `request` only marks a render as pending; the render runs once control
+    returns to the event loop and reads the current widget values, so the
+    latest value always wins and at most one render is in flight. While
+    `interacting()` is true (e.g. a slider is held down) renders are done
+    in preview quality, and a full-quality render follows once input has
+    been quiet for `settle_ms`.
+    """
+
+    def __init__(self, render, interacting=lambda: False, settle_ms=150, parent=None):
+        super().__init__(parent)
+        self._render = render
+        self._interacting = interacting
+        self._rendering = False
+        self._needs_full = False
+
+        self._pending = QtCore.QTimer(self)
+        self._pending.setSingleShot(True)
+        self._pending.setInterval(0)
+        self._pending.timeout.connect(self._run)
+
+        self._settle = QtCore.QTimer(self)
+        self._settle.setSingleShot(True)
+        self._settle.setInterval(settle_ms)
+        self._settle.timeout.connect(self._run_full)
+
+    def request(self, *_):
+        self._settle.start()
+        if not self._pending.isActive():
+            self._pending.start()
+
+    def pending(self):
+        """Whether a requested render has not run yet."""
+        return self._pending.isActive()
+
+    def flush(self):
+        """Render at full quality right now, dropping anything pending."""
+        self._pending.stop()
+        self._settle.stop()
+        self._call(preview=False)
+
+    def _run(self):
+        if self._rendering:
+            self._pending.start()
+            return
+        self._call(preview=self._interacting())
+
+    def _run_full(self):
+        if self._interacting():
+            self._settle.start()
+        elif self._needs_full:
+            self._call(preview=False)
+
+    def _call(self, preview):
+        self._rendering = True
+        try:
+            with span('update_plot', preview=preview):
+                self._render(preview=preview)
+        finally:
+            self._rendering = False
+        self._needs_full = preview
@@ -0,0 +1,304 @@
+import numpy as np
+from matplotlib.path import Path
+from matplotlib.widgets import LassoSelector, PolygonSelector, RectangleSelector
+from tracing import traced
+
+BRUSH_MODES = ('replace', 'add', 'subtract', 'intersect')
+
+
+def combine_masks(previous, mask, mode='replace'):
+    """Fold a new brush `mask` into the `previous` one.
+
+    A `previous` of None means nothing was brushed yet. Charts show that
+    as every row selected, so subtracting and intersecting treat it as all
+    rows: a first subtract keeps every row outside `mask`, and a first
+    intersect keeps `mask`. Adding to it starts from `mask` alone.
+    """
+    if mode not in BRUSH_MODES:
+        raise ValueError(f'unknown brush mode {mode!r}, expected one of {BRUSH_MODES}')
+    if previous is None or mode == 'replace':
+        return ~mask if mode == 'subtract' else mask
+    if mode == 'add':
+        return previous | mask
+    if mode == 'subtract':
+        return previous & ~mask
+    return previous & mask
+
+
+def polygon_mask(xs, ys, vertices, resolution=512):
+    """Even-odd point-in-polygon test for many points at once.
+
+    The polygon's bounding box is cut into `resolution` x `resolution`
+    cells and scanline-filled once (crossings per cell row, then a running
+    parity along it), so most points are classified by a single cell
+    lookup whatever the vertex count. Points in cells the outline passes
+    through get an exact test with matplotlib's Path.contains_points.
+    """
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    verts = np.asarray(vertices, dtype=float).reshape(-1, 2)
+    verts = verts[np.isfinite(verts).all(axis=1)]
+    if len(verts) < 3:
+        return np.zeros(len(xs), dtype=bool)
+    closed = np.vstack((verts, verts[:1]))
+    (x0, y0), (x1, y1) = verts.min(axis=0), verts.max(axis=0)
+    n = resolution
+    cw = (x1 - x0) / n or 1.0
+    ch = (y1 - y0) / n or 1.0
+    ax, ay = closed[:-1].T
+    bx, by = closed[1:].T
+
+    centers = y0 + (np.arange(n) + 0.5) * ch
+    lo, hi = np.minimum(ay, by), np.maximum(ay, by)
+    rows, edges = np.nonzero((lo <= centers[:, None]) & (centers[:, None] < hi))
+    t = (centers[rows] - ay[edges]) / (by[edges] - ay[edges])
+    cross = (ax[edges] + t * (bx[edges] - ax[edges]) - x0) / cw - 0.5
+    toggles = np.zeros((n, n + 1), dtype=np.int32)
+    np.add.at(toggles, (rows, np.clip(np.ceil(cross), 0, n).astype(np.int64)), 1)
+    inside = (np.cumsum(toggles, axis=1)[:, :n] & 1).astype(bool)
+
+    steps = np.ceil(np.maximum(np.abs(bx - ax) / cw, np.abs(by - ay) / ch)).astype(np.int64) + 1
+    edge = np.repeat(np.arange(len(steps)), steps)
+    t = (np.arange(len(edge)) - np.repeat(np.cumsum(steps) - steps, steps)) / np.maximum(steps[edge] - 1, 1)
+    boundary = np.zeros((n + 2, n + 2), dtype=bool)
+    bi = np.clip(((ay[edge] + t * (by[edge] - ay[edge]) - y0) / ch).astype(np.int64), 0, n - 1) + 1
+    bj = np.clip(((ax[edge] + t * (bx[edge] - ax[edge]) - x0) / cw).astype(np.int64), 0, n - 1) + 1
+    for di in (-1, 0, 1):
+        for dj in (-1, 0, 1):
+            boundary[bi + di, bj + dj] = True
+    boundary = boundary[1:-1, 1:-1]
+
+    mask = np.zeros(len(xs), dtype=bool)
+    candidates = np.flatnonzero((xs >= x0) & (xs <= x1) & (ys >= y0) & (ys <= y1))
+    i = np.clip(((ys[candidates] - y0) / ch).astype(np.int64), 0, n - 1)
+    j = np.clip(((xs[candidates] - x0) / cw).astype(np.int64), 0, n - 1)
+    mask[candidates] = inside[i, j]
+    edge_rows = candidates[boundary[i, j]]
+    if len(edge_rows):
+        points = np.column_stack((xs[edge_rows], ys[edge_rows]))
+        mask[edge_rows] = Path(closed, closed=True).contains_points(points)
+    return mask
+
+
+class RectIndex:
+    """Rectangle queries over two coordinate arrays, backed by a sorted x index.
+
+    The x values are argsorted once (pass `order` to reuse an argsort of the
+    same x column). A query binary-searches the x range, checks y only for
+    the rows inside it and returns a boolean mask over all rows. Corners
+    may be given in any order, so reversed drags select the same rows as
+    forward ones. NaN coordinates never match.
+    """
+
+    def __init__(self, xs, ys, order=None):
+        self.xs = np.asarray(xs, dtype=float)
+        self.ys = np.asarray(ys, dtype=float)
+        self.order = np.argsort(self.xs, kind='stable') if order is None else order
+        self._sorted_x = self.xs[self.order]
+
+    def __len__(self):
+        return len(self.xs)
+
+    def rows(self, x1, y1, x2, y2):
+        """Row numbers inside the rectangle, in x order."""
+        xlo, xhi = sorted((x1, x2))
+        ylo, yhi = sorted((y1, y2))
+        start = np.searchsorted(self._sorted_x, xlo, side='left')
+        stop = np.searchsorted(self._sorted_x, xhi, side='right')
+        rows = self.order[start:stop]
+        y = self.ys[rows]
+        return rows[(y >= ylo) & (y <= yhi)]
+
+    def query(self, x1, y1, x2, y2):
+        """Boolean mask of the rows inside the rectangle."""
+        mask = np.zeros(len(self.xs), dtype=bool)
+        mask[self.rows(x1, y1, x2, y2)] = True
+        return mask
+
+    def polygon(self, vertices):
+        """Boolean mask of the rows inside the polygon (see `polygon_mask`),
+        testing only the rows inside its bounding box."""
+        mask = np.zeros(len(self.xs), dtype=bool)
+        verts = np.asarray(vertices, dtype=float).reshape(-1, 2)
+        if len(verts) < 3:
+            return mask
+        (x1, y1), (x2, y2) = np.nanmin(verts, axis=0), np.nanmax(verts, axis=0)
+        rows = self.rows(x1, y1, x2, y2)
+        mask[rows] = polygon_mask(self.xs[rows], self.ys[rows], verts)
+        return mask
+
+
+class Brush:
+    """Brushes one chart with a rectangle, lasso or polygon.
+
+    Each finished gesture is folded into the brush's mask according to
+    `mode` (see `BRUSH_MODES`), and the result goes to `callback` as a
+    boolean mask over all rows. Outside of 'replace' mode the shape is
+    cleared after each gesture, so editing it cannot apply it twice.
+
+    The gestures come from matplotlib selectors on `ax`. Subclasses that
+    take them from elsewhere override `set_tool`, `disconnect`,
+    `_clear_shape` and `_redraw`, and feed `select_rect`/`onlasso`.
+    """
+
+    tools = ('rectangle', 'lasso', 'polygon')
+
+    def __init__(self, xs, ys, ax, callback, canvas, tool='rectangle', mode='replace',
+                 color='red', alpha=0.6, edgecolor='black'):
+        self.index = RectIndex(xs, ys)
+        self.callback = callback
+        self.ax = ax
+        self.canvas = canvas
+        self.mode = mode
+        self.mask = None
+        self.rec = None
+        self.set_tool(tool)
+
+    def set_tool(self, tool):
+        if tool not in self.tools:
+            raise ValueError(f'unknown brush tool {tool!r}, expected one of {self.tools}')
+        if self.rec is not None:
+            self.disconnect()
+        if tool == 'rectangle':
+            self.rec = RectangleSelector(self.ax, self.onselect, useblit=True, interactive=True)
+        elif tool == 'lasso':
+            self.rec = LassoSelector(self.ax, self.onlasso, useblit=True)
+        else:
+            self.rec = PolygonSelector(self.ax, self.onlasso, useblit=True)
+        self.tool = tool
+        self.canvas.draw_idle()
+
+    def set_mode(self, mode):
+        if mode not in BRUSH_MODES:
+            raise ValueError(f'unknown brush mode {mode!r}, expected one of {BRUSH_MODES}')
+        self.mode = mode
+
+    def disconnect(self):
+        self.rec.disconnect_events()
+        for artist in self.rec.artists:
+            artist.remove()
+
+    def update_coords(self, xs, ys):
+        if xs is not self.index.xs or ys is not self.index.ys:
+            self.index = RectIndex(xs, ys)
+        if self.mask is not None and len(self.mask) < len(xs):
+            self.mask = np.concatenate((self.mask, np.zeros(len(xs) - len(self.mask), dtype=bool)))
+
+    def onselect(self, eclick, erelease):
+        self.select_rect(eclick.xdata, eclick.ydata, erelease.xdata, erelease.ydata)
+
+    @traced('brush', 'event')
+    def select_rect(self, x1, y1, x2, y2):
+        if x1 == x2 or y1 == y2:
+            # A click without a drag removes the rectangle: in 'replace'
+            # mode that withdraws the brush, elsewhere it changes nothing.
+            if self.mode == 'replace' and self.mask is not None:
+                self.mask = None
+                self.callback(None)
+            return
+        self.apply(self.index.query(x1, y1, x2, y2))
+
+    @traced('brush', 'event')
+    def onlasso(self, vertices):
+        self.apply(self.index.polygon(vertices))
+
+    def apply(self, mask):
+        self.mask = combine_masks(self.mask, mask, self.mode)
+        self.callback(self.mask)
+        if self.mode != 'replace' or self.tool == 'polygon':
+            self._clear_shape()
+        self._redraw()
+
+    def _clear_shape(self):
+        self.rec.clear()
+
+    def _redraw(self):
+        self.canvas.draw_idle()
+
+
+class SelectionModel:
+    """One selection over all dataset rows, shared by every linked view.
+
+    Each brush reports its own mask under a source name. The combined
+    selection is the union or intersection (`mode`) of the source masks,
+    kept as a boolean array over row ids; `mask` is None while nothing is
+    brushed. A source whose mask selects no rows stays in the combination
+    as an explicit empty selection. Subscribers are called with the
+    combined mask every time it changes.
+    """
+
+    modes = ('union', 'intersect')
+
+    def __init__(self, n_rows, mode='union'):
+        self.n_rows = n_rows
+        self.mode = mode
+        self.mask = None
+        self.version = 0
+        self._sources = {}
+        self._subscribers = []
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback)
+
+    def set(self, source, mask):
+        """Replace `source`'s mask; None withdraws it."""
+        if mask is None:
+            self._sources.pop(source, None)
+        else:
+            self._sources[source] = mask
+        self._update()
+
+    def sources(self) -> dict:
+        """The current mask of every source, by name."""
+        return dict(self._sources)
+
+    def clear(self):
+        self._sources.clear()
+        self._update()
+
+    def set_mode(self, mode):
+        if mode not in self.modes:
+            raise ValueError(f'unknown selection mode {mode!r}, expected one of {self.modes}')
+        self.mode = mode
+        self._update()
+
+    def resize(self, n_rows):
+        """Grow to `n_rows`; new rows start unselected in every source.
+
+        Subscribers are not notified: the caller re-renders its views with
+        the padded `mask` together with the new rows.
+        """
+        pad = n_rows - self.n_rows
+        if pad <= 0:
+            return
+        self.n_rows = n_rows
+        for source, mask in self._sources.items():
+            self._sources[source] = np.concatenate((mask, np.zeros(pad, dtype=bool)))
+        if self.mask is not None:
+            self.mask = np.concatenate((self.mask, np.zeros(pad, dtype=bool)))
+
+    def packed(self):
+        """The combined mask as a bitset (np.packbits), or None."""
+        return None if self.mask is None else np.packbits(self.mask)
+
+    def combined(self, skip=None):
+        """The combined mask of the sources whose name `skip(name)` does not
+        reject (all of them without `skip`); None when there are none."""
+        masks = [mask for source, mask in self._sources.items() if skip is None or not skip(source)]
+        if not masks:
+            return None
+        if len(masks) == 1:
+            return masks[0]
+        if self.mode == 'union':
+            return np.logical_or.reduce(masks)
+        return np.logical_and.reduce(masks)
+
+    def _update(self):
+        mask = self.combined()
+        if mask is None and self.mask is None:
+            return
+        self.mask = mask
+        self.version += 1
+        for callback in self._subscribers:
+            callback(mask)
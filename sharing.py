@@ -0,0 +1,170 @@
+import hashlib
+import itertools
+import os
+import struct
+
+import numpy as np
+from PyQt6 import QtCore, QtNetwork, sip
+
+# sender id, rows, bytes of packed mask (0 rows = no selection)
+_HEADER = struct.Struct('<QQI')
+_ids = itertools.count(1)
+
+
+def channel_name(path):
+    """Local socket name shared by every window showing the CSV at `path`."""
+    digest = hashlib.blake2b(os.path.abspath(path).encode(), digest_size=8).hexdigest()
+    return f'bubbles-{digest}'
+
+
+class SelectionBus(QtCore.QObject):
+    """Shares a SelectionModel with every other window on the same dataset.
+
+    Windows, in this process or others, meet on a local socket named after
+    the dataset: the first one to open it serves, later ones connect, and
+    the server relays each message to everybody else. When a window's own
+    brushes change, it sends their combined mask as a bitset; a received
+    mask becomes the source 'remote:<sender>' of the local model, so remote
+    selections combine with local ones like any other brush and are never
+    echoed back. Received masks are kept, so `reapply` can fit them to a
+    model that has grown since (a window still loading its rows). A window
+    that disconnects has its selection withdrawn, and if the server goes
+    away the remaining windows elect a new one.
+    """
+
+    prefix = 'remote:'
+
+    def __init__(self, selection, path, parent=None):
+        super().__init__(parent)
+        self.selection = selection
+        self.name = channel_name(path)
+        self.id = (os.getpid() << 20) | next(_ids)
+        self.server = None
+        self.peers = {}
+        self.received = {}
+        self._last = None
+        self._closing = False
+        self._unsubscribe = selection.subscribe(lambda mask: self.publish())
+        self._join()
+
+    @property
+    def serving(self):
+        return self.server is not None
+
+    def publish(self):
+        """Send the local brushes' mask if it changed since the last send."""
+        mask = self.selection.combined(skip=lambda source: source.startswith(self.prefix))
+        if mask is self._last or (mask is not None and self._last is not None
+                                  and len(mask) == len(self._last) and np.array_equal(mask, self._last)):
+            return
+        self._last = mask
+        self._send(self._encode(self.id, mask))
+
+    def close(self):
+        self._closing = True
+        self._unsubscribe()
+        for socket in list(self.peers):
+            socket.disconnectFromServer()
+        self.peers.clear()
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+
+    def _join(self):
+        socket = QtNetwork.QLocalSocket(self)
+        socket.connectToServer(self.name)
+        if socket.waitForConnected(200):
+            self._add_peer(socket)
+            self._last = None
+            self.publish()
+            return
+        socket.deleteLater()
+        server = QtNetwork.QLocalServer(self)
+        if not server.listen(self.name):
+            # A stale socket file left by a crashed server, or a race with
+            # another window electing itself; clear and retry once.
+            QtNetwork.QLocalServer.removeServer(self.name)
+            if not server.listen(self.name):
+                server.deleteLater()
+                QtCore.QTimer.singleShot(100, self._join)
+                return
+        server.newConnection.connect(self._accept)
+        self.server = server
+
+    def _accept(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self._add_peer(socket)
+            if self._last is not None:
+                socket.write(self._encode(self.id, self._last))
+            for sender, mask in self.received.items():
+                socket.write(self._encode(sender, mask))
+
+    def _add_peer(self, socket):
+        self.peers[socket] = {'buffer': b'', 'senders': set()}
+        socket.readyRead.connect(lambda: self._read(socket))
+        socket.disconnected.connect(lambda: self._drop(socket))
+
+    def _drop(self, socket):
+        peer = self.peers.pop(socket, None)
+        if peer is None or self._closing or sip.isdeleted(self) or sip.isdeleted(socket):
+            return
+        socket.deleteLater()
+        for sender in peer['senders']:
+            self._apply(sender, None)
+            if self.serving:
+                self._send(self._encode(sender, None))
+        if not self.serving:
+            # The server left: drop what it relayed and elect a new one.
+            for sender in list(self.received):
+                self._apply(sender, None)
+            self._join()
+
+    def _read(self, socket):
+        peer = self.peers.get(socket)
+        if peer is None:
+            return
+        data = peer['buffer'] + bytes(socket.readAll())
+        while len(data) >= _HEADER.size:
+            sender, rows, size = _HEADER.unpack_from(data)
+            end = _HEADER.size + size
+            if len(data) < end:
+                break
+            message, data = data[:end], data[end:]
+            peer['senders'].add(sender)
+            if self.serving:
+                self._send(message, skip=socket)
+            mask = np.unpackbits(np.frombuffer(message, np.uint8, size, _HEADER.size), count=rows) \
+                .astype(bool) if rows else None
+            self._apply(sender, mask)
+        peer['buffer'] = data
+
+    def reapply(self):
+        """Re-apply the received selections, e.g. after the model grew to
+        hold rows they cover."""
+        for sender, mask in list(self.received.items()):
+            self._apply(sender, mask)
+
+    def _apply(self, sender, mask):
+        if sender == self.id:
+            return
+        if mask is None:
+            self.received.pop(sender, None)
+        else:
+            self.received[sender] = mask
+        n = self.selection.n_rows
+        if mask is not None and len(mask) != n:
+            mask = np.concatenate((mask, np.zeros(max(0, n - len(mask)), dtype=bool)))[:n]
+        self.selection.set(f'{self.prefix}{sender}', mask)
+
+    def _send(self, message, skip=None):
+        for socket in self.peers:
+            if socket is not skip:
+                socket.write(message)
+
+    @staticmethod
+    def _encode(sender, mask):
+        if mask is None:
+            return _HEADER.pack(sender, 0, 0)
+        packed = np.packbits(mask)
+        return _HEADER.pack(sender, len(mask), len(packed)) + packed.tobytes()
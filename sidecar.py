@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+
+FORMAT = 2
+SAMPLE_BYTES = 1 << 20
+
+
+def cache_dir(path):
+    """The sidecar directory of `path`: `<path>.cache` next to the CSV."""
+    return f'{path}.cache'
+
+
+def fingerprint(path):
+    """Size, mtime and a hash of the first and last MiB of `path`.
+
+    Hashing only the ends keeps the check cheap on multi-GB files while
+    still catching rewrites that keep the size and modification time.
+    """
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        digest.update(f.read(SAMPLE_BYTES))
+        if stat.st_size > SAMPLE_BYTES:
+            f.seek(max(stat.st_size - SAMPLE_BYTES, SAMPLE_BYTES))
+            digest.update(f.read())
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': digest.hexdigest()}
+
+
+class StringTable:
+    """Read-only list of strings kept as UTF-8 bytes plus end offsets."""
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def encode(cls, strings):
+        blobs = [s.encode('utf-8') for s in strings]
+        offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in blobs], out=offsets[1:])
+        return cls(np.frombuffer(b''.join(blobs), dtype=np.uint8), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode('utf-8')
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+def read(path, usecols=None):
+    """Memory-map the cached columns of `path`.
+
+    Returns `(arrays, kinds, categories)` for ColumnStore.attach, or None
+    when there is no cache, it is stale (the CSV's fingerprint changed),
+    it lacks one of `usecols` (every header column when `usecols` is
+    None, since a cache may hold only the subset it was written from) or
+    it cannot be read.
+    """
+    root = cache_dir(path)
+    try:
+        with open(os.path.join(root, 'schema.json')) as f:
+            schema = json.load(f)
+        if schema.get('format') != FORMAT or schema.get('source') != fingerprint(path):
+            return None
+        entries = schema['columns']
+        wanted = set(schema['header'] if usecols is None else usecols)
+        if not wanted <= {entry['name'] for entry in entries}:
+            return None
+        entries = [entry for entry in entries if entry['name'] in wanted]
+        arrays, kinds, categories = {}, {}, {}
+        for entry in entries:
+            name, stem = entry['name'], os.path.join(root, entry['file'])
+            arrays[name] = np.load(f'{stem}.npy', mmap_mode='r')
+            kinds[name] = entry['kind']
+            if entry['kind'] == 'text':
+                categories[name] = StringTable(np.load(f'{stem}.strings.npy', mmap_mode='r'),
+                                               np.load(f'{stem}.offsets.npy', mmap_mode='r'))
+            if len(arrays[name]) != schema['rows']:
+                return None
+    except (OSError, ValueError, KeyError):
+        return None
+    return arrays, kinds, categories
+
+
+def write(path, arrays, kinds, categories, header):
+    """Write the sidecar cache of `path`; returns False if it could not.
+
+    `header` lists every column of the CSV, so a later full load can tell
+    a cache written from a `usecols` subset apart from a complete one.
+
+    Files go to a temporary directory that replaces the old cache only once
+    it is complete, so readers never see a half-written cache.
+    """
+    root = cache_dir(path)
+    tmp = f'{root}.tmp{os.getpid()}'
+    try:
+        source = fingerprint(path)
+        os.makedirs(tmp, exist_ok=True)
+        entries = []
+        for i, (name, arr) in enumerate(arrays.items()):
+            entry = {'name': name, 'kind': kinds[name], 'file': f'c{i}'}
+            stem = os.path.join(tmp, entry['file'])
+            np.save(f'{stem}.npy', np.ascontiguousarray(arr))
+            if kinds[name] == 'text':
+                table = StringTable.encode(categories.get(name, []))
+                np.save(f'{stem}.strings.npy', table.data)
+                np.save(f'{stem}.offsets.npy', table.offsets)
+            entries.append(entry)
+        rows = len(next(iter(arrays.values()))) if arrays else 0
+        with open(os.path.join(tmp, 'schema.json'), 'w') as f:
+            json.dump({'format': FORMAT, 'source': source, 'rows': rows,
+                       'header': list(header), 'columns': entries}, f)
+        if os.path.isdir(root):
+            shutil.rmtree(root)
+        os.replace(tmp, root)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        return False
+    return True
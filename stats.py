@@ -0,0 +1,147 @@
+import math
+
+import numpy as np
+
+
+class _Bins:
+    """Counts over a contiguous range of integer bucket indexes."""
+
+    def __init__(self):
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def add(self, index, counts=None):
+        if not len(index):
+            return
+        lo, hi = int(index.min()), int(index.max())
+        self._cover(lo, hi)
+        self.counts += np.bincount(index - self.offset, weights=counts,
+                                   minlength=len(self.counts)).astype(np.int64)
+
+    def merge(self, other):
+        if len(other.counts):
+            self.add(np.arange(other.offset, other.offset + len(other.counts)), other.counts)
+
+    def _cover(self, lo, hi):
+        if not len(self.counts):
+            self.offset, self.counts = lo, np.zeros(hi - lo + 1, dtype=np.int64)
+            return
+        start = min(lo, self.offset)
+        end = max(hi, self.offset + len(self.counts) - 1)
+        if start < self.offset or end >= self.offset + len(self.counts):
+            counts = np.zeros(end - start + 1, dtype=np.int64)
+            counts[self.offset - start:self.offset - start + len(self.counts)] = self.counts
+            self.offset, self.counts = start, counts
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch with relative accuracy (DDSketch style).
+
+    Values go into logarithmic buckets of ratio `gamma`, kept separately
+    for positive and negative values, so any quantile is returned within
+    `relative_accuracy` of a true value of that rank. Memory depends on
+    the dynamic range of the data, not on how many values were added, and
+    two sketches merge by adding their bucket counts.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = _Bins()
+        self.negative = _Bins()
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, values):
+        """Add an array of finite values."""
+        values = np.asarray(values, dtype=np.float64)
+        magnitude = np.abs(values)
+        tiny = magnitude < 1e-300
+        self.zeros += int(tiny.sum())
+        self.positive.add(self._index(values[(values > 0) & ~tiny]))
+        self.negative.add(self._index(-values[(values < 0) & ~tiny]))
+        self.count += len(values)
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError('cannot merge sketches of different accuracy')
+        self.positive.merge(other.positive)
+        self.negative.merge(other.negative)
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def quantile(self, q):
+        """The value at quantile `q` (0..1); NaN when the sketch is empty."""
+        if not self.count:
+            return math.nan
+        neg, pos = self.negative, self.positive
+        values = np.concatenate((
+            -self._value(np.arange(neg.offset, neg.offset + len(neg.counts)))[::-1],
+            [0.0],
+            self._value(np.arange(pos.offset, pos.offset + len(pos.counts))),
+        ))
+        counts = np.concatenate((neg.counts[::-1], [self.zeros], pos.counts))
+        rank = q * (self.count - 1)
+        return float(values[np.searchsorted(np.cumsum(counts), rank, side='right')])
+
+    def _index(self, magnitude):
+        return np.ceil(np.log(magnitude) / self._log_gamma).astype(np.int64)
+
+    def _value(self, index):
+        return 2 * self.gamma ** index.astype(np.float64) / (self.gamma + 1)
+
+
+class ColumnStats:
+    """Summary of one number column, updated chunk by chunk as rows arrive.
+
+    `rows` counts every row seen, `nan_count` the empty ones; `min`, `max`,
+    `min_positive` and the quantile sketch cover the finite values.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.rows = 0
+        self.nan_count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.min_positive = math.inf
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    @classmethod
+    def of(cls, values, relative_accuracy=0.01):
+        stats = cls(relative_accuracy)
+        stats.update(values)
+        return stats
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        self.rows += len(values)
+        self.nan_count += int(np.isnan(values).sum())
+        finite = values[np.isfinite(values)]
+        if len(finite):
+            self.min = min(self.min, float(finite.min()))
+            self.max = max(self.max, float(finite.max()))
+            positive = finite[finite > 0]
+            if len(positive):
+                self.min_positive = min(self.min_positive, float(positive.min()))
+        self.sketch.add(finite)
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.nan_count += other.nan_count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.min_positive = min(self.min_positive, other.min_positive)
+        self.sketch.merge(other.sketch)
+
+    def quantile(self, q):
+        """Approximate quantile of the finite values, clamped to [min, max]."""
+        value = self.sketch.quantile(q)
+        return value if math.isnan(value) else min(max(value, self.min), self.max)
+
+    def range(self, fill=None):
+        """(min, max) of the column once empty cells are replaced by `fill`."""
+        lo, hi = self.min, self.max
+        if fill is not None and self.nan_count:
+            lo, hi = min(lo, fill), max(hi, fill)
+        return lo, hi
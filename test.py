@@ -3,6 +3,8 @@ from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import numpy as np
+from hittest import HitTester
+from overlay import BlitOverlay
 
 class HoverApp(QMainWindow):
     def __init__(self):
@@ -21,6 +23,8 @@ class HoverApp(QMainWindow):
         self.x = np.linspace(0, 2 * np.pi, 100)
         self.y = np.sin(self.x)
         self.scatter = self.ax.scatter(self.x, self.y)
+        self.hits = HitTester(self.ax)
+        self.hits.set_points(self.x, self.y, self.scatter.get_sizes())
         self.ax.set_title('Hover over points')
         
         # Set up annotation box (initially invisible)
@@ -30,12 +34,16 @@ class HoverApp(QMainWindow):
                                       arrowprops=dict(arrowstyle="->"))
         self.annot.set_visible(False)
 
+        # Redraw only the annotation on hover, over a cached background
+        self.overlay = BlitOverlay(self.canvas)
+        self.overlay.add(self.annot)
+
         # Connect the hover event
         self.canvas.mpl_connect("motion_notify_event", self.hover)
 
     def update_annot(self, ind):
         # Get the position of the hovered point
-        pos = self.scatter.get_offsets()[ind["ind"][0]]
+        pos = self.scatter.get_offsets()[ind]
         self.annot.xy = pos
         text = f"x: {pos[0]:.2f}, y: {pos[1]:.2f}"
         self.annot.set_text(text)
@@ -45,16 +53,16 @@ class HoverApp(QMainWindow):
         # Check if the event is inside the axes
         if event.inaxes == self.ax:
             # Check if the cursor is over a point
-            cont, ind = self.scatter.contains(event)
-            if cont:
+            ind = self.hits.query(event.x, event.y)
+            if ind is not None:
                 # Update and show the annotation
                 self.update_annot(ind)
                 self.annot.set_visible(True)
-                self.canvas.draw_idle()
-            else:
+                self.overlay.update()
+            elif self.annot.get_visible():
                 # Hide the annotation
                 self.annot.set_visible(False)
-                self.canvas.draw_idle()
+                self.overlay.update()
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -0,0 +1,62 @@
+from collections import OrderedDict
+
+import numpy as np
+
+
+class TooltipCache:
+    """Tooltip text per row of a ColumnStore, one 'field: value' line per field.
+
+    Lazily, each hovered row is formatted once and kept in an LRU of
+    `maxsize` rows. With `eager`, every row is formatted up front into one
+    string array from the store's cached column texts, and a hover is a
+    plain index. Either way the cache follows the store's `version` and is
+    dropped when the data or the field list changes. Fields the store does
+    not have are left out.
+    """
+
+    def __init__(self, store, fields, maxsize=4096, eager=False):
+        self.store = store
+        self.maxsize = maxsize
+        self.eager = eager
+        self.fields = tuple(fields)
+        self._version = None
+        self._rows = OrderedDict()
+        self._strings = None
+
+    def set_fields(self, fields):
+        fields = tuple(fields)
+        if fields != self.fields:
+            self.fields = fields
+            self.clear()
+
+    def clear(self):
+        self._version = None
+        self._rows.clear()
+        self._strings = None
+
+    def text(self, row) -> str:
+        if self._version != self.store.version:
+            self.clear()
+            self._version = self.store.version
+        if self.eager:
+            if self._strings is None:
+                self._strings = self._format_all()
+            return self._strings[row]
+        text = self._rows.get(row)
+        if text is None:
+            text = ''.join(f'{field}: {self.store.text(field, row)}\n' for field in self._present())
+            self._rows[row] = text
+            if len(self._rows) > self.maxsize:
+                self._rows.popitem(last=False)
+        else:
+            self._rows.move_to_end(row)
+        return text
+
+    def _present(self):
+        return [field for field in self.fields if field in self.store.kinds]
+
+    def _format_all(self):
+        strings = np.full(len(self.store), '', dtype=object)
+        for field in self._present():
+            strings = strings + f'{field}: ' + self.store.texts(field) + '\n'
+        return strings
@@ -0,0 +1,125 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+_NULL = nullcontext()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'cat', 'args', 'start')
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, self.cat, self.start, time.perf_counter(), self.args)
+        return False
+
+
+class Tracer:
+    """Timed spans of the render pipeline, exportable as a Chrome trace.
+
+    Disabled by default: `span` then returns one shared no-op context
+    manager, so instrumented code pays a single attribute check. When
+    enabled, every span becomes a complete ('X') trace event with the
+    thread it ran on, kept in a ring buffer of `max_events` so a long
+    session never grows without bound. `last` holds the latest duration
+    per span name, in seconds, for live displays.
+    """
+
+    def __init__(self, max_events=200_000):
+        self.enabled = False
+        self.events = deque(maxlen=max_events)
+        self.last = {}
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+
+    def span(self, name, cat='render', **args):
+        if not self.enabled:
+            return _NULL
+        return _Span(self, name, cat, args)
+
+    def record(self, name, cat, start, end, args=None):
+        self.last[name] = end - start
+        self.events.append({
+            'name': name, 'cat': cat, 'ph': 'X',
+            'ts': (start - self._origin) * 1e6, 'dur': (end - start) * 1e6,
+            'pid': self._pid, 'tid': threading.get_ident(), 'args': args or {},
+        })
+
+    def export(self, path):
+        """Write the recorded events as Chrome trace JSON (chrome://tracing, Perfetto)."""
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': list(self.events), 'displayTimeUnit': 'ms'}, f)
+
+
+tracer = Tracer()
+
+
+def span(name, cat='render', **args):
+    return tracer.span(name, cat, **args)
+
+
+def enable(path=None):
+    """Start recording; with `path`, export the trace there when the process exits."""
+    tracer.enabled = True
+    if path:
+        atexit.register(tracer.export, path)
+
+
+def traced(name, cat='render'):
+    """Decorator recording every call of the function as a span."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(name, cat):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def instrument_canvas(canvas, name='draw', **args):
+    """Record every full draw of a matplotlib canvas as a span."""
+    draw = canvas.draw
+
+    def timed_draw(*a, **kw):
+        with tracer.span(name, 'draw', **args):
+            return draw(*a, **kw)
+    canvas.draw = timed_draw
+
+
+def frame_time_label(canvas, names=('draw', 'prepare_chart', 'chart.render', 'hover', 'brush'),
+                     interval_ms=500):
+    """A small label over the top-left corner of a Qt canvas that shows the
+    latest duration of the `names` spans, refreshed every `interval_ms`."""
+    from PyQt6 import QtCore, QtWidgets
+
+    label = QtWidgets.QLabel(canvas)
+    label.setStyleSheet('background: rgba(0, 0, 0, 160); color: white; padding: 2px; font: 9pt monospace;')
+    label.move(4, 4)
+
+    def refresh():
+        parts = [f'{name} {tracer.last[name] * 1e3:.2f} ms' for name in names if name in tracer.last]
+        label.setText('\n'.join(parts) or 'no frames yet')
+        label.adjustSize()
+
+    timer = QtCore.QTimer(label)
+    timer.timeout.connect(refresh)
+    timer.start(interval_ms)
+    refresh()
+    label.show()
+    return label
@@ -0,0 +1,51 @@
+class ViewInvalidator:
+    """Re-renders only the views whose inputs changed since their last render.
+
+    Each view registers an `inputs` callable returning a dict of values that
+    compare with == (attribute names, the slider value, a selection counter)
+    and a `render(changed, preview)` callable that receives the set of input names
+    that differ from the previous render. Views whose inputs are unchanged
+    are skipped and counted in `skipped`.
+
+    Renders may finish asynchronously, so inputs are only recorded once the
+    view reports a full render through `rendered`. A render that fails or
+    is dropped (superseded, or prepared for stale data) is never recorded
+    and the next flush tries again. Preview renders are not recorded
+    either, so the full-quality render that follows them still sees the
+    inputs as changed.
+    """
+
+    def __init__(self):
+        self._views = {}
+        self._last = {}
+        self.renders = 0
+        self.skipped = 0
+
+    def add_view(self, name, inputs, render):
+        self._views[name] = (inputs, render)
+
+    def invalidate(self, name):
+        """Force `name` to re-render on the next flush."""
+        self._last.pop(name, None)
+
+    def changed(self, name):
+        inputs, _ = self._views[name]
+        current = inputs()
+        last = self._last.get(name)
+        if last is None:
+            return current, set(current)
+        return current, {key for key, value in current.items() if last.get(key) != value}
+
+    def flush(self, *names, preview=False):
+        for name in names or list(self._views):
+            current, changed = self.changed(name)
+            if not changed:
+                self.skipped += 1
+                continue
+            self._views[name][1](changed, preview=preview)
+            self.renders += 1
+
+    def rendered(self, name, inputs):
+        """Record `inputs`, as returned by the view's `inputs` callable, as
+        the ones `name` now shows at full quality."""
+        self._last[name] = inputs